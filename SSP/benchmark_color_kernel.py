@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the color analysis kernel.
+Compares the original allocating implementation of is_page_black_only with
+ColorPixelKernel on synthetic pages of several sizes. Run it on the kiosk itself;
+results on a desktop CPU say little about the Pi.
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from screens.Print_Options_Screen import ColorPixelKernel
+
+# Page sizes in inches, rendered at the analyzer's default 150 DPI
+PAGE_SIZES = {
+    'A5': (5.83, 8.27),
+    'A4': (8.27, 11.69),
+    'A3': (11.69, 16.54),
+    'A0 strip': (33.11, 4.0),
+}
+DPI = 150
+REPEATS = 20
+
+def original_count_colored_pixels(page_image, color_tolerance=15):
+    """The implementation is_page_black_only used before the kernel was introduced."""
+    b, g, r = page_image[:, :, 0], page_image[:, :, 1], page_image[:, :, 2]
+    channel_max = np.maximum(np.maximum(r, g), b)
+    channel_min = np.minimum(np.minimum(r, g), b)
+    color_diff = (channel_max - channel_min).astype(np.uint8)
+    return np.count_nonzero(color_diff > color_tolerance)
+
+def make_page(width_in, height_in):
+    """A mostly gray page with a colored block, like a handout with a logo."""
+    width, height = int(width_in * DPI), int(height_in * DPI)
+    gray = np.random.randint(0, 256, size=(height, width, 1), dtype=np.uint8)
+    page = np.repeat(gray, 3, axis=2)
+    page[:height // 10, :width // 10] = (30, 90, 200)
+    return page
+
+def measure(count_function, page_image):
+    """Returns (seconds per call, peak bytes allocated by one call)."""
+    count_function(page_image)  # warm up buffers
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        count_function(page_image)
+    elapsed = (time.perf_counter() - start) / REPEATS
+
+    tracemalloc.start()
+    count_function(page_image)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+def main():
+    """Run the benchmark for every page size."""
+    print(f"🔍 Color kernel benchmark at {DPI} DPI, {REPEATS} runs per size\n")
+    kernel = ColorPixelKernel()
+    for name, (width_in, height_in) in PAGE_SIZES.items():
+        page_image = make_page(width_in, height_in)
+        expected = original_count_colored_pixels(page_image)
+        actual = kernel.count_colored_pixels(page_image)
+        if expected != actual:
+            print(f"❌ {name}: kernel counted {actual} colored pixels, expected {expected}")
+            continue
+
+        old_time, old_peak = measure(original_count_colored_pixels, page_image)
+        new_time, new_peak = measure(kernel.count_colored_pixels, page_image)
+        height, width = page_image.shape[:2]
+        print(f"📄 {name} ({width}x{height})")
+        print(f"   original: {old_time * 1000:7.2f} ms, {old_peak / 1024:9.1f} KB allocated")
+        print(f"   kernel:   {new_time * 1000:7.2f} ms, {new_peak / 1024:9.1f} KB allocated")
+        print(f"   speedup:  {old_time / new_time:.2f}x")
+
+if __name__ == "__main__":
+    main()
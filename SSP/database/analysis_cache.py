@@ -0,0 +1,240 @@
+# database/analysis_cache.py
+
+import sqlite3
+import os
+import json
+import time
+import hashlib
+import threading
+
+# (path, size, mtime) -> hex digest, so unchanged files are only hashed once per run
+_content_hash_memo = {}
+
+def file_content_hash(file_path, chunk_size=1024 * 1024):
+    """Returns the SHA-256 of a file's contents, reading it in chunks."""
+    stat = os.stat(file_path)
+    memo_key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    digest = _content_hash_memo.get(memo_key)
+    if digest is None:
+        hasher = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                hasher.update(chunk)
+        digest = hasher.hexdigest()
+        _content_hash_memo[memo_key] = digest
+    return digest
+
+def known_content_hash(file_path):
+    """Returns the file's digest if file_content_hash already computed it, else None."""
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return _content_hash_memo.get((os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns))
+
+class AnalysisCache:
+    """
+    Persistent cache of per-page color analysis results, keyed by file content hash,
+    page index, DPI and analysis thresholds. A second table keys results by page
+    fingerprint so identical pages are reused across documents. Least recently used
+    rows are evicted once a table grows past max_entries.
+    """
+
+    def __init__(self, db_name="analysis_cache.db", max_entries=50000):
+        # Stored next to the main database
+        db_dir = os.path.join(os.path.dirname(__file__), '..', 'data')
+        os.makedirs(db_dir, exist_ok=True)
+        self.db_path = os.path.join(db_dir, db_name)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.fingerprint_hits = 0
+        # The cache is used from analysis threads as well as the GUI thread
+        self.lock = threading.Lock()
+        self.conn = None
+        self.connect()
+        self.create_tables()
+
+    def connect(self):
+        """Establish a connection to the SQLite database."""
+        try:
+            self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        except sqlite3.Error as e:
+            print(f"Analysis cache connection error: {e}")
+
+    def close(self):
+        """Close the database connection."""
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+
+    def create_tables(self):
+        """Create cache tables if they don't exist."""
+        if not self.conn:
+            return
+        try:
+            with self.lock:
+                cursor = self.conn.cursor()
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS page_analysis_cache (
+                        file_hash TEXT NOT NULL,
+                        page_index INTEGER NOT NULL,
+                        dpi INTEGER NOT NULL,
+                        settings TEXT NOT NULL,
+                        result TEXT NOT NULL,
+                        last_used REAL NOT NULL,
+                        PRIMARY KEY (file_hash, page_index, dpi, settings)
+                    )
+                """)
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_page_analysis_cache_last_used
+                    ON page_analysis_cache (last_used)
+                """)
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS page_fingerprint_cache (
+                        fingerprint TEXT NOT NULL,
+                        dpi INTEGER NOT NULL,
+                        settings TEXT NOT NULL,
+                        result TEXT NOT NULL,
+                        last_used REAL NOT NULL,
+                        PRIMARY KEY (fingerprint, dpi, settings)
+                    )
+                """)
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_page_fingerprint_cache_last_used
+                    ON page_fingerprint_cache (last_used)
+                """)
+                self.conn.commit()
+        except sqlite3.Error as e:
+            print(f"Error creating analysis cache tables: {e}")
+
+    def get_page_results(self, file_hash, pages, dpi, settings):
+        """Returns {page_num: result} for the 1-based pages found in the cache."""
+        found = {}
+        if not self.conn:
+            self.misses += len(pages)
+            return found
+        try:
+            with self.lock:
+                cursor = self.conn.cursor()
+                now = time.time()
+                for page_num in pages:
+                    key = (file_hash, page_num - 1, dpi, settings)
+                    cursor.execute("""
+                        SELECT result FROM page_analysis_cache
+                        WHERE file_hash = ? AND page_index = ? AND dpi = ? AND settings = ?
+                    """, key)
+                    row = cursor.fetchone()
+                    if row:
+                        found[page_num] = json.loads(row[0])
+                        cursor.execute("""
+                            UPDATE page_analysis_cache SET last_used = ?
+                            WHERE file_hash = ? AND page_index = ? AND dpi = ? AND settings = ?
+                        """, (now,) + key)
+                self.conn.commit()
+        except sqlite3.Error as e:
+            print(f"Error reading analysis cache: {e}")
+        self.hits += len(found)
+        self.misses += len(pages) - len(found)
+        return found
+
+    def put_page_results(self, file_hash, page_results, dpi, settings):
+        """Stores {page_num: result} and evicts the least recently used rows."""
+        if not self.conn or not page_results:
+            return
+        try:
+            with self.lock:
+                cursor = self.conn.cursor()
+                now = time.time()
+                cursor.executemany("""
+                    INSERT OR REPLACE INTO page_analysis_cache
+                    (file_hash, page_index, dpi, settings, result, last_used)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, [
+                    (file_hash, page_num - 1, dpi, settings, json.dumps(result), now)
+                    for page_num, result in page_results.items()
+                ])
+                self.evict(cursor, 'page_analysis_cache')
+                self.conn.commit()
+        except sqlite3.Error as e:
+            print(f"Error writing analysis cache: {e}")
+
+    def get_fingerprint_results(self, fingerprints, dpi, settings):
+        """Returns {fingerprint: result} for the page fingerprints found in the cache."""
+        found = {}
+        if not self.conn:
+            return found
+        try:
+            with self.lock:
+                cursor = self.conn.cursor()
+                now = time.time()
+                for fingerprint in fingerprints:
+                    key = (fingerprint, dpi, settings)
+                    cursor.execute("""
+                        SELECT result FROM page_fingerprint_cache
+                        WHERE fingerprint = ? AND dpi = ? AND settings = ?
+                    """, key)
+                    row = cursor.fetchone()
+                    if row:
+                        found[fingerprint] = json.loads(row[0])
+                        cursor.execute("""
+                            UPDATE page_fingerprint_cache SET last_used = ?
+                            WHERE fingerprint = ? AND dpi = ? AND settings = ?
+                        """, (now,) + key)
+                self.conn.commit()
+        except sqlite3.Error as e:
+            print(f"Error reading analysis cache: {e}")
+        self.fingerprint_hits += len(found)
+        return found
+
+    def put_fingerprint_results(self, fingerprint_results, dpi, settings):
+        """Stores {fingerprint: result} and evicts the least recently used rows."""
+        if not self.conn or not fingerprint_results:
+            return
+        try:
+            with self.lock:
+                cursor = self.conn.cursor()
+                now = time.time()
+                cursor.executemany("""
+                    INSERT OR REPLACE INTO page_fingerprint_cache
+                    (fingerprint, dpi, settings, result, last_used)
+                    VALUES (?, ?, ?, ?, ?)
+                """, [
+                    (fingerprint, dpi, settings, json.dumps(result), now)
+                    for fingerprint, result in fingerprint_results.items()
+                ])
+                self.evict(cursor, 'page_fingerprint_cache')
+                self.conn.commit()
+        except sqlite3.Error as e:
+            print(f"Error writing analysis cache: {e}")
+
+    def evict(self, cursor, table):
+        """Delete the least recently used rows of `table` beyond max_entries."""
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        excess = cursor.fetchone()[0] - self.max_entries
+        if excess > 0:
+            cursor.execute(f"""
+                DELETE FROM {table} WHERE rowid IN (
+                    SELECT rowid FROM {table} ORDER BY last_used ASC LIMIT ?
+                )
+            """, (excess,))
+
+    def get_stats(self):
+        """Hit/miss counters for this run plus the number of cached pages."""
+        entries = 0
+        if self.conn:
+            try:
+                with self.lock:
+                    cursor = self.conn.cursor()
+                    cursor.execute("SELECT COUNT(*) FROM page_analysis_cache")
+                    entries = cursor.fetchone()[0]
+            except sqlite3.Error as e:
+                print(f"Error reading analysis cache stats: {e}")
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'fingerprint_hits': self.fingerprint_hits,
+            'entries': entries
+        }
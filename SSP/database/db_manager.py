@@ -74,6 +74,14 @@ class DatabaseManager:
                     context TEXT
                 )
             """)
+            # Ink accounting columns added after the first release
+            cursor.execute("PRAGMA table_info(transactions)")
+            transaction_columns = {row['name'] for row in cursor.fetchall()}
+            # ink_measured_pages of ink_total_pages analyzed pages had their ink measured
+            for column, column_type in (('ink_coverage', 'REAL'), ('color_coverage', 'REAL'),
+                                        ('ink_measured_pages', 'INTEGER'), ('ink_total_pages', 'INTEGER')):
+                if column not in transaction_columns:
+                    cursor.execute(f"ALTER TABLE transactions ADD COLUMN {column} {column_type}")
             # --- NEW: Settings Table ---
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS settings (
@@ -127,11 +135,14 @@ class DatabaseManager:
         try:
             cursor = self.conn.cursor()
             cursor.execute("""
-                INSERT INTO transactions (file_name, pages, copies, color_mode, total_cost, amount_paid, change_given, status)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                INSERT INTO transactions (file_name, pages, copies, color_mode, total_cost, amount_paid, change_given, status,
+                                          ink_coverage, color_coverage, ink_measured_pages, ink_total_pages)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, (
                 data['file_name'], data['pages'], data['copies'], data['color_mode'],
-                data['total_cost'], data['amount_paid'], data['change_given'], data['status']
+                data['total_cost'], data['amount_paid'], data['change_given'], data['status'],
+                data.get('ink_coverage'), data.get('color_coverage'),
+                data.get('ink_measured_pages'), data.get('ink_total_pages')
             ))
             self.conn.commit()
         except sqlite3.Error as e:
@@ -18,6 +18,8 @@ from screens.thank_you_screen import ThankYouScreen
 from database.models import init_db
 from printing.printer_manager import PrinterManager  # Import the new manager
 from sms_manager import cleanup_sms
+from screens.worker_pool import start_worker_pool, cleanup_worker_pool
+from screens.document_session import cleanup_document_session
 
 try:
     from screens.usb_file_manager import USBFileManager
@@ -169,6 +171,11 @@ class PrintingSystemApp(QMainWindow):
         try:
             cleanup_sms()
             print("SMS system cleaned up")
+            # Threads still waiting on page results must finish before the pool is terminated
+            self.printing_options_screen.stop_analysis_threads()
+            self.file_browser_screen.stop_render_threads()
+            cleanup_worker_pool()
+            cleanup_document_session()
         except Exception as e:
             print(f"Error during cleanup: {e}")
 
@@ -182,6 +189,9 @@ def main():
         print("\n🔄 Initializing database...")
         init_db()
         print("✅ Database initialization successful\n")
+
+        # Fork the analysis workers before Qt starts any threads
+        start_worker_pool()
         
         # Start application
         app = QApplication(sys.argv)
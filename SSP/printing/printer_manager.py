@@ -10,6 +10,9 @@ try:
 except ImportError:
     PYMUPDF_AVAILABLE = False
 
+from screens.document_session import get_document_session
+from screens.page_selection import PageSelection
+
 # IMPORTANT: Replace this with your exact printer name found via `lpstat -p`
 PRINTER_NAME = "HP_Smart_Tank_580_590_series_5E0E1D_USB"
 
@@ -26,7 +29,8 @@ class PrinterThread(QThread):
         self.file_path = file_path
         self.copies = copies
         self.color_mode = color_mode
-        self.selected_pages = sorted(selected_pages)
+        # A PageSelection from the file browser; plain page lists are still accepted
+        self.selected_pages = selected_pages if isinstance(selected_pages, PageSelection) else PageSelection.from_pages(selected_pages)
         self.printer_name = printer_name
         self.temp_pdf_path = None
 
@@ -105,22 +109,19 @@ class PrinterThread(QThread):
         Creates a new PDF file containing only the pages the user selected.
         """
         try:
-            original_doc = fitz.open(self.file_path)
-            # fitz requires a 0-indexed list of pages
-            pages_0_indexed = [p - 1 for p in self.selected_pages]
-            
             temp_doc = fitz.open()  # Create a new empty PDF
             
-            # Copy each selected page individually (compatible with older PyMuPDF versions)
-            for page_num in pages_0_indexed:
-                temp_doc.insert_pdf(original_doc, from_page=page_num, to_page=page_num)
+            # The customer's document is usually still open from the preview and analysis
+            with get_document_session().document(self.file_path) as original_doc:
+                # Copy each run of consecutive pages at once; fitz page numbers are 0-indexed
+                for first, last in self.selected_pages.ranges():
+                    temp_doc.insert_pdf(original_doc, from_page=first - 1, to_page=last - 1)
             
             # Save to a temporary file
             fd, self.temp_pdf_path = tempfile.mkstemp(suffix=".pdf", prefix="printjob-")
             os.close(fd)
             temp_doc.save(self.temp_pdf_path, garbage=4, deflate=True)
             temp_doc.close()
-            original_doc.close()
             print(f"Created temporary PDF for printing at: {self.temp_pdf_path}")
         except Exception as e:
             error_msg = f"Failed to create temporary PDF: {str(e)}"
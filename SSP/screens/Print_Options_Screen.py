@@ -1,7 +1,10 @@
 import os
+import re
+import hashlib
+import threading
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
-    QFrame, QMessageBox, QStackedLayout, QSizePolicy
+    QFrame, QMessageBox, QStackedLayout, QSizePolicy, QProgressBar
 )
 from PyQt5.QtCore import Qt, QThread, pyqtSignal
 from PyQt5.QtGui import QPixmap
@@ -10,93 +13,783 @@ import fitz
 import cv2
 import numpy as np
 from typing import List, Dict
+from screens.worker_pool import get_worker_pool, render_lock
+from screens.document_session import get_document_session
+from database.analysis_cache import AnalysisCache, file_content_hash
 
 def get_base_dir():
     return os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 
+class ColorPixelKernel:
+    """
+    Counts colored pixels without per-page temporaries: the channel max/min and the
+    mask live in buffers that are grown once and reused for every page and strip.
+    Not thread-safe; PDFColorAnalyzer keeps one kernel per thread.
+    """
+
+    def __init__(self):
+        self._capacity = 0
+        self._max_buffer = self._min_buffer = self._mask_buffer = None
+        # Channel minimum of the last channel_spread() image; empty until there is one
+        self._channel_min = np.empty((0, 0), dtype=np.uint8)
+
+    def _ensure_capacity(self, pixel_count: int):
+        if pixel_count > self._capacity:
+            self._max_buffer = np.empty(pixel_count, dtype=np.uint8)
+            self._min_buffer = np.empty(pixel_count, dtype=np.uint8)
+            self._mask_buffer = np.empty(pixel_count, dtype=np.bool_)
+            self._capacity = pixel_count
+            # The previous view points into the buffer that was just replaced
+            self._channel_min = np.empty((0, 0), dtype=np.uint8)
+
+    def channel_spread(self, page_image: np.ndarray) -> np.ndarray:
+        """
+        Returns max(r, g, b) - min(r, g, b) per pixel. The result is a view into a reused
+        buffer and is overwritten by the next call.
+        """
+        height, width = page_image.shape[:2]
+        pixel_count = height * width
+        self._ensure_capacity(pixel_count)
+        channel_max = self._max_buffer[:pixel_count].reshape(height, width)
+        channel_min = self._min_buffer[:pixel_count].reshape(height, width)
+        r, g, b = page_image[:, :, 0], page_image[:, :, 1], page_image[:, :, 2]
+        np.maximum(r, g, out=channel_max)
+        np.maximum(channel_max, b, out=channel_max)
+        np.minimum(r, g, out=channel_min)
+        np.minimum(channel_min, b, out=channel_min)
+        # uint8 subtraction cannot wrap here because max >= min for every pixel
+        np.subtract(channel_max, channel_min, out=channel_max)
+        self._channel_min = channel_min
+        return channel_max
+
+    def count_above(self, spread: np.ndarray, color_tolerance: int) -> int:
+        mask = self._mask_buffer[:spread.size].reshape(spread.shape)
+        np.greater(spread, color_tolerance, out=mask)
+        return int(np.count_nonzero(mask))
+
+    def count_inked(self, white_level: int) -> int:
+        """Pixels of the last channel_spread() image whose darkest channel is below white_level; 0 before any."""
+        if self._channel_min.size == 0: return 0
+        mask = self._mask_buffer[:self._channel_min.size].reshape(self._channel_min.shape)
+        np.less(self._channel_min, white_level, out=mask)
+        return int(np.count_nonzero(mask))
+
+    def count_colored_pixels(self, page_image: np.ndarray, color_tolerance: int = 15) -> int:
+        if page_image.size == 0: return 0
+        return self.count_above(self.channel_spread(page_image), color_tolerance)
+
 class PDFColorAnalyzer:
-    def __init__(self, black_price: float, color_price: float):
+    # Pixels rendered per analyzed page: an A4 page at 150 DPI. The render DPI is chosen
+    # from the page size so every page costs about the same to analyze.
+    TARGET_PAGE_PIXELS = int(8.27 * 150 * 11.69 * 150)
+    MIN_ANALYSIS_DPI = 36
+    MAX_ANALYSIS_DPI = 300
+    # Share of the page that must be colored to charge for color: 200 pixels of an A4
+    # page at 150 DPI, the fixed pixel threshold used before resolution became adaptive.
+    DEFAULT_COLOR_AREA_THRESHOLD = 200 / TARGET_PAGE_PIXELS
+    # Thumbnail-scale passes tried before the full render, as fractions of its DPI.
+    PROGRESSIVE_STAGE_SCALES = (0.25, 0.5)
+    # A thin line straddling a pixel boundary at low DPI covers two blended pixel rows, so a
+    # stage's area estimate can be twice the real one; a stage only calls color beyond that.
+    EARLY_COLOR_MARGIN = 2
+    # Coverage of a page decided before its full-resolution pass
+    UNMEASURED_COVERAGE = {'ink_coverage': None, 'color_coverage': None}
+    # Upper bound for one rendered strip plus the kernel buffers used to count it.
+    TILE_MEMORY_BUDGET = 24 * 1024 * 1024
+    # RGB samples plus the kernel's max, min and mask buffers, one byte each per pixel.
+    BYTES_PER_ANALYZED_PIXEL = 6
+    # Pixels whose darkest channel is at least this light count as bare paper.
+    WHITE_LEVEL = 245
+    # A page whose only image covers at least this share of it is treated as a scan.
+    SCAN_MIN_PAGE_FRACTION = 0.85
+    # OpenCV flags for decoding a JPEG scan at 1/1, 1/2, 1/4 or 1/8 size.
+    JPEG_REDUCED_DECODES = {1: cv2.IMREAD_COLOR, 2: cv2.IMREAD_REDUCED_COLOR_2,
+                            4: cv2.IMREAD_REDUCED_COLOR_4, 8: cv2.IMREAD_REDUCED_COLOR_8}
+    # Bump when the stored per-page result changes shape so older cache rows are ignored.
+    CACHE_VERSION = 6
+    # Span types of page.get_texttrace(): filled glyphs and invisible (OCR layer) text
+    TEXT_FILL = 0
+    TEXT_INVISIBLE = 3
+    # Indirect references inside object source, e.g. "12 0 R"
+    INDIRECT_REFERENCE = re.compile(r'\b(\d+)\s+(\d+)\s+R\b')
+    # Keys pointing back up the page tree; following them would hash the whole document.
+    BACK_REFERENCE = re.compile(r'/(?:Parent|P)\s+\d+\s+\d+\s+R\b')
+
+    def __init__(self, black_price: float, color_price: float, progressive: bool = True,
+                 color_tolerance: int = 15, color_area_threshold: float = DEFAULT_COLOR_AREA_THRESHOLD,
+                 cache=None, color_coverage_tiers=None, target_page_pixels: int = TARGET_PAGE_PIXELS):
         self.black_price = black_price
         self.color_price = color_price
+        # Optional [(min_color_coverage, price), ...] in ascending order; None keeps a flat color_price
+        self.color_coverage_tiers = color_coverage_tiers
+        self.progressive = progressive
+        self.color_tolerance = color_tolerance
+        self.color_area_threshold = color_area_threshold
+        self.target_page_pixels = target_page_pixels
+        self.cache = cache
+        # Per-page results for the current customer session live with the document in the
+        # document session; these are by page fingerprint, across documents: {(fingerprint, dpi): result}
+        self.fingerprint_results = {}
+        self.session_lock = threading.Lock()
+        self._thread_state = threading.local()
+
+    @property
+    def kernel(self) -> ColorPixelKernel:
+        """This thread's kernel; the speculative and foreground threads may analyze at once."""
+        kernel = getattr(self._thread_state, 'kernel', None)
+        if kernel is None:
+            kernel = self._thread_state.kernel = ColorPixelKernel()
+        return kernel
+
+    def count_colored_pixels(self, page_image: np.ndarray, color_tolerance: int = 15) -> int:
+        return self.kernel.count_colored_pixels(page_image, color_tolerance)
 
     def is_page_black_only(self, page_image: np.ndarray,
                           color_tolerance: int = 15,
                           pixel_count_threshold: int = 200) -> bool:
         if page_image.size == 0: return True
-        b, g, r = page_image[:, :, 0], page_image[:, :, 1], page_image[:, :, 2]
-        channel_max = np.maximum(np.maximum(r, g), b)
-        channel_min = np.minimum(np.minimum(r, g), b)
-        color_diff = (channel_max - channel_min).astype(np.uint8)
-        colored_pixel_count = np.count_nonzero(color_diff > color_tolerance)
-        return colored_pixel_count < pixel_count_threshold
-
-    def analyze_pdf_pages(self, pdf_path: str, pages_to_check: List[int], user_wants_color: bool, dpi: int = 150) -> Dict:
+        return self.count_colored_pixels(page_image, color_tolerance) < pixel_count_threshold
+
+    def render_page_pixmap(self, page, dpi: int, clip=None):
+        mat = fitz.Matrix(dpi/72, dpi/72)
+        # Rendered at the default AA level, never while a thumbnail render has it lowered
+        with render_lock:
+            return page.get_pixmap(matrix=mat, clip=clip, alpha=False, colorspace=fitz.csRGB)
+
+    def pixmap_image(self, pix) -> np.ndarray:
+        """Zero-copy (height, width, 3) view over the pixmap samples, valid while pix is alive."""
+        samples = pix.samples_mv if hasattr(pix, 'samples_mv') else pix.samples
+        buffer = np.frombuffer(samples, dtype=np.uint8)
+        return np.lib.stride_tricks.as_strided(buffer, shape=(pix.height, pix.width, 3),
+                                               strides=(pix.stride, 3, 1), writeable=False)
+
+    def iter_page_images(self, page, dpi: int):
+        """
+        Yields the page rendered at `dpi` as zero-copy views; each view is only valid until
+        the next one is requested. Pages that would not fit in TILE_MEMORY_BUDGET
+        (posters, huge scans) are yielded as horizontal strips rendered through clip
+        rectangles, so callers can stop before the rest of the page is rendered.
+        """
+        zoom = dpi / 72
+        rect = page.rect
+        width = max(1, int(rect.width * zoom))
+        height = max(1, int(rect.height * zoom))
+        rows_per_strip = max(1, self.TILE_MEMORY_BUDGET // (width * self.BYTES_PER_ANALYZED_PIXEL))
+        if rows_per_strip >= height:
+            pix = self.render_page_pixmap(page, dpi)
+            yield self.pixmap_image(pix)
+            return
+
+        strip_height = rows_per_strip / zoom
+        y = rect.y0
+        while y < rect.y1:
+            clip = fitz.Rect(rect.x0, y, rect.x1, min(y + strip_height, rect.y1))
+            pix = self.render_page_pixmap(page, dpi, clip)
+            yield self.pixmap_image(pix)
+            y += strip_height
+
+    def measure_page(self, page, dpi: int, color_tolerance: int = 15, stop_at: float = None,
+                     scale: float = 1.0) -> Dict:
+        """
+        Renders the page strip by strip and counts colored, faintly colored and inked
+        (non-white) pixels from the same buffers. Stops once colored * scale reaches `stop_at`.
+        """
+        counts = {'colored': 0, 'faint': 0, 'inked': 0, 'pixels': 0}
+        for page_image in self.iter_page_images(page, dpi):
+            self.add_image_counts(counts, page_image, color_tolerance)
+            if stop_at is not None and counts['colored'] * scale >= stop_at: break
+        return counts
+
+    def add_image_counts(self, counts: Dict, page_image: np.ndarray, color_tolerance: int = 15):
+        if page_image.size == 0: return
+        spread = self.kernel.channel_spread(page_image)
+        counts['colored'] += self.kernel.count_above(spread, color_tolerance)
+        counts['faint'] += self.kernel.count_above(spread, color_tolerance // 2)
+        counts['inked'] += self.kernel.count_inked(self.WHITE_LEVEL)
+        counts['pixels'] += spread.size
+
+    def coverage_from_counts(self, counts: Dict) -> Dict:
+        """Ink and color coverage as fractions of the rendered area."""
+        pixels = counts['pixels']
+        if not pixels: return {'ink_coverage': 0.0, 'color_coverage': 0.0}
+        return {
+            'ink_coverage': round(counts['inked'] / pixels, 4),
+            'color_coverage': round(counts['colored'] / pixels, 4)
+        }
+
+    def analyze_page_raster(self, page, dpi: float = 150, color_tolerance: int = 15,
+                            pixel_count_threshold: float = 200) -> Dict:
+        """
+        Decides B&W vs color from rendered pixels. In progressive mode the page is rendered
+        at increasing resolutions and the first conclusive stage wins; only ambiguous pages
+        are rendered at the full `dpi`. Coverage is only measured by a complete render at the
+        full `dpi`: low-resolution counts are inflated by anti-aliasing, so pages decided by
+        an earlier stage have none. With color_coverage_tiers, color pages are always
+        rendered at the full `dpi` because their price depends on it.
+        """
+        stages = self.PROGRESSIVE_STAGE_SCALES if self.progressive else ()
+        for stage_scale in stages:
+            stage_dpi = dpi * stage_scale
+            # Very large pages are already analyzed near MIN_ANALYSIS_DPI; coarser passes blur too much.
+            if stage_dpi < self.MIN_ANALYSIS_DPI / 2: continue
+            scale = dpi / stage_dpi
+            # A 1px colored line stays 1px wide at low DPI, so the area estimate can be up to
+            # `scale` times too high, twice that for a line straddling pixels (EARLY_COLOR_MARGIN).
+            early_color_at = None if self.color_coverage_tiers else self.EARLY_COLOR_MARGIN * pixel_count_threshold
+            counts = self.measure_page(page, stage_dpi, color_tolerance, stop_at=early_color_at, scale=scale)
+            # Borderline pages go on to the next stage
+            if early_color_at is not None and counts['colored'] * scale >= early_color_at:
+                return dict(self.UNMEASURED_COVERAGE, is_black_only=False)
+            # Downsampling blends small colored details with their surroundings, so a page
+            # only counts as gray when nothing is even half as saturated as the tolerance.
+            if counts['faint'] == 0:
+                return dict(self.UNMEASURED_COVERAGE, is_black_only=True)
+
+        # Counted to the end, so the coverage covers the whole page
+        counts = self.measure_page(page, dpi, color_tolerance)
+        return dict(self.coverage_from_counts(counts), is_black_only=counts['colored'] < pixel_count_threshold)
+
+    def is_color_gray(self, color, color_tolerance: int = 15) -> bool:
+        if not color: return True
+        if len(color) == 1: return True
+        components = color[:3]
+        return (max(components) - min(components)) * 255 <= color_tolerance
+
+    def get_resources_source(self, pdf_document, xref: int) -> str:
+        # Resources may be inherited from the page tree, so walk up /Parent until found.
+        while xref:
+            kind, value = pdf_document.xref_get_key(xref, "Resources")
+            if kind == 'xref': return pdf_document.xref_object(int(value.split()[0]))
+            if kind == 'dict': return value
+            kind, value = pdf_document.xref_get_key(xref, "Parent")
+            xref = int(value.split()[0]) if kind == 'xref' else 0
+        return ""
+
+    def is_page_vector_gray(self, page, color_tolerance: int = 15) -> bool:
+        """
+        Fast pass that inspects the page content without rendering it.
+        Returns True only when every drawing, text span and image on the page is gray;
+        False means the page could not be proven gray and must be rasterized.
+        """
+        if not self.is_page_content_gray(page, color_tolerance): return False
+        return self.are_images_gray(page.get_image_info())
+
+    def are_images_gray(self, image_infos: List[Dict]) -> bool:
+        # Only single-component (DeviceGray / 1-bit gray) images are provably gray;
+        # RGB, CMYK, indexed images and stencil masks need the pixel check.
+        return all(image.get('colorspace') == 1 for image in image_infos)
+
+    def is_page_content_gray(self, page, color_tolerance: int = 15) -> bool:
+        """Like is_page_vector_gray, but ignores the page's images."""
+        # Annotations, shadings and patterns are painted without showing up below.
+        if page.first_annot or page.first_widget: return False
+        pdf_document = page.parent
+        for xref in [page.xref] + [xobject[0] for xobject in page.get_xobjects()]:
+            resources = self.get_resources_source(pdf_document, xref)
+            if '/Shading' in resources or '/Pattern' in resources: return False
+
+        for drawing in page.get_drawings():
+            if not self.is_color_gray(drawing.get('color'), color_tolerance): return False
+            if not self.is_color_gray(drawing.get('fill'), color_tolerance): return False
+
+        # get_text() only reports the fill color; the trace has one span per painting
+        # operation, so text with an outline (render modes 1, 2, 5, 6) shows up as stroke spans.
+        for span in page.get_texttrace():
+            if span['type'] == self.TEXT_INVISIBLE: continue
+            # Outlined or clipping text is left to the renderer
+            if span['type'] != self.TEXT_FILL: return False
+            if not self.is_color_gray(span.get('color'), color_tolerance): return False
+        return True
+
+    def find_scanned_image(self, page, image_infos: List[Dict]):
+        """
+        Returns the image info of a scanned page (one embedded image covering the page)
+        if it can be classified from its own pixels, else None.
+        """
+        # get_image_info(xrefs=True) would decode and hash every image, so the xref comes
+        # from the page resources instead; inline images do not appear there at all.
+        page_images = page.get_images(full=True)
+        if len(image_infos) != 1 or len(page_images) != 1: return None
+        xref, smask, filter_name = page_images[0][0], page_images[0][1], page_images[0][8]
+        if smask: return None
+        image = dict(image_infos[0], xref=xref, filter=filter_name)
+        bbox = fitz.Rect(image['bbox']) & page.rect
+        if bbox.is_empty or abs(bbox) < self.SCAN_MIN_PAGE_FRACTION * abs(page.rect): return None
+        # Masks and decode arrays change what ends up on paper; leave those to the renderer.
+        pdf_document = page.parent
+        for key in ('Mask', 'Decode', 'ImageMask'):
+            if pdf_document.xref_get_key(xref, key)[0] != 'null': return None
+        return image
+
+    def scan_reduction(self, image: Dict) -> int:
+        """Largest reduction factor at which the scan still has target_page_pixels."""
+        image_pixels = image['width'] * image['height']
+        for factor in (8, 4, 2):
+            if image_pixels / (factor * factor) >= self.target_page_pixels: return factor
+        return 1
+
+    def is_plain_jpeg(self, image: Dict) -> bool:
+        # Only three-component JPEGs; CMYK JPEGs are often stored inverted.
+        return image['filter'] == 'DCTDecode' and image.get('colorspace') == 3
+
+    def full_decode_bytes(self, image: Dict) -> int:
+        """Peak memory of decoding the image at full size and converting it to RGB."""
+        components = image.get('colorspace') or 3
+        return image['width'] * image['height'] * (components + (0 if components == 3 else 3))
+
+    def scan_fits_memory(self, image: Dict) -> bool:
+        """JPEG scans decode at reduced size; any other scan is decoded whole, within TILE_MEMORY_BUDGET."""
+        return self.is_plain_jpeg(image) or self.full_decode_bytes(image) <= self.TILE_MEMORY_BUDGET
+
+    def decode_scanned_image(self, pdf_document, image: Dict, factor: int):
+        """
+        Decodes the embedded image to (height, width, 3) pixels reduced by `factor`.
+        Returns (pixels, owner); owner keeps the buffer behind a zero-copy view alive.
+        """
+        xref = image['xref']
+        if self.is_plain_jpeg(image):
+            # libjpeg skips most of the IDCT work when asked for a reduced size
+            stream = pdf_document.xref_stream_raw(xref)
+            pixels = cv2.imdecode(np.frombuffer(stream, dtype=np.uint8), self.JPEG_REDUCED_DECODES[factor])
+            if pixels is not None and pixels.ndim == 3: return pixels, None
+
+        if self.full_decode_bytes(image) > self.TILE_MEMORY_BUDGET:
+            raise ValueError("scan is too large to decode whole")
+        pix = fitz.Pixmap(pdf_document, xref)
+        if factor > 1: pix.shrink(factor.bit_length() - 1)
+        if pix.alpha: pix = fitz.Pixmap(pix, 0)
+        if pix.n != 3: pix = fitz.Pixmap(fitz.csRGB, pix)
+        return self.pixmap_image(pix), pix
+
+    def analyze_scanned_page(self, page, image: Dict, color_tolerance: int = 15) -> Dict:
+        """
+        Classifies a scanned page from its embedded image without rendering the page.
+        JPEG scans go through the same progressive stages as rendered pages, using
+        libjpeg's reduced decodes; other images are decoded once.
+        """
+        # The page area outside the image counts as bare paper
+        covered = abs(fitz.Rect(image['bbox']) & page.rect) / abs(page.rect)
+        final_factor = self.scan_reduction(image)
+        factors = [final_factor]
+        if self.progressive and self.is_plain_jpeg(image):
+            stage_factors = [int(final_factor / stage_scale) for stage_scale in self.PROGRESSIVE_STAGE_SCALES]
+            factors = [factor for factor in stage_factors if factor in self.JPEG_REDUCED_DECODES] + factors
+
+        for factor in factors:
+            pixels, owner = self.decode_scanned_image(page.parent, image, factor)
+            counts = {'colored': 0, 'faint': 0, 'inked': 0, 'pixels': 0}
+            self.add_image_counts(counts, pixels, color_tolerance)
+            del pixels, owner
+            counts['pixels'] = counts['pixels'] / covered
+            threshold = self.color_area_threshold * counts['pixels']
+            if factor == final_factor:
+                return dict(self.coverage_from_counts(counts), is_black_only=counts['colored'] < threshold)
+            # Same reasoning, and the same coverage rule, as the progressive stages in analyze_page_raster
+            scale = factor / final_factor
+            if not self.color_coverage_tiers and counts['colored'] >= self.EARLY_COLOR_MARGIN * threshold * scale:
+                return dict(self.UNMEASURED_COVERAGE, is_black_only=False)
+            if counts['faint'] == 0:
+                return dict(self.UNMEASURED_COVERAGE, is_black_only=True)
+
+    def analysis_dpi(self, page) -> float:
+        """Resolution at which this page renders to about target_page_pixels."""
+        page_area = page.rect.width * page.rect.height / (72 * 72)  # square inches
+        if page_area <= 0: return self.MAX_ANALYSIS_DPI
+        dpi = (self.target_page_pixels / page_area) ** 0.5
+        return min(max(dpi, self.MIN_ANALYSIS_DPI), self.MAX_ANALYSIS_DPI)
+
+    def pixel_threshold(self, page, dpi: float) -> float:
+        """color_area_threshold converted to a pixel count for this page at `dpi`."""
+        page_pixels = page.rect.width * page.rect.height * (dpi / 72) ** 2
+        return max(1.0, self.color_area_threshold * page_pixels)
+
+    def analyze_page(self, page, dpi: int = None) -> Dict:
+        """Analyzes one page; dpi=None picks the resolution from the page size."""
+        if self.is_page_content_gray(page, self.color_tolerance):
+            image_infos = page.get_image_info()
+            if self.are_images_gray(image_infos):
+                # Nothing was rendered, so only the color coverage is known
+                return {'is_black_only': True, 'method': 'vector', 'ink_coverage': None, 'color_coverage': 0.0}
+            scanned_image = self.find_scanned_image(page, image_infos)
+            # Scans too large to decode whole are rendered in strips like any other page
+            if scanned_image is not None and self.scan_fits_memory(scanned_image):
+                try:
+                    page_result = self.analyze_scanned_page(page, scanned_image, self.color_tolerance)
+                    page_result['is_black_only'] = bool(page_result['is_black_only'])
+                    page_result['method'] = 'scan'
+                    return page_result
+                except Exception as e:
+                    print(f"Scanned image fast path failed, rendering page instead: {e}")
+
+        dpi = dpi or self.analysis_dpi(page)
+        page_result = self.analyze_page_raster(page, dpi, self.color_tolerance, self.pixel_threshold(page, dpi))
+        page_result['is_black_only'] = bool(page_result['is_black_only'])
+        page_result['method'] = 'raster'
+        return page_result
+
+    def worker_settings(self) -> Dict:
+        """Constructor arguments that recreate this analyzer inside a worker process."""
+        return {
+            'black_price': self.black_price, 'color_price': self.color_price, 'progressive': self.progressive,
+            'color_tolerance': self.color_tolerance, 'color_area_threshold': self.color_area_threshold,
+            'target_page_pixels': self.target_page_pixels,
+            # Hashable, since workers key their analyzers by these settings
+            'color_coverage_tiers': tuple(map(tuple, self.color_coverage_tiers)) if self.color_coverage_tiers else None
+        }
+
+    def cache_settings_key(self) -> str:
+        """Thresholds that affect a page's verdict or coverage; results are only reused when these match."""
+        # With coverage tiers every color page has a measured color coverage
+        return (f"v={self.CACHE_VERSION};tol={self.color_tolerance};area={self.color_area_threshold:.3e};"
+                f"target={self.target_page_pixels};tiers={int(bool(self.color_coverage_tiers))}")
+
+    def color_page_price(self, color_coverage) -> float:
+        """The highest coverage tier reached, or the flat color price without tiers."""
+        price = self.color_price
+        if self.color_coverage_tiers and color_coverage is not None:
+            for min_coverage, tier_price in self.color_coverage_tiers:
+                if color_coverage >= min_coverage: price = tier_price
+        return price
+
+    def page_price(self, page_result: Dict, user_wants_color: bool):
+        """Returns (price, charged_as_color) for one analyzed page."""
+        if user_wants_color and not page_result['is_black_only']:
+            return self.color_page_price(page_result.get('color_coverage')), True
+        return self.black_price, False
+
+    def build_results(self, page_results: Dict, pages_to_check: List[int], user_wants_color: bool) -> Dict:
         results = {
             'page_analysis': {}, 
             'pricing': {'black_pages_count': 0, 'color_pages_count': 0, 'base_cost': 0},
+            # Sums of per-page coverage, i.e. ink used in full-page equivalents for one copy
+            'coverage': {'ink_coverage': 0.0, 'color_coverage': 0.0, 'measured_pages': 0},
             'error': None
         }
-        try:
-            pdf_document = fitz.open(pdf_path)
-            for page_num_1_based in pages_to_check:
-                page_num_0_based = page_num_1_based - 1
+        for page_num_1_based in pages_to_check:
+            page_result = page_results.get(page_num_1_based)
+            if page_result is None: continue
+            is_black_only = page_result['is_black_only']
+
+            ink_coverage = page_result.get('ink_coverage')
+            color_coverage = page_result.get('color_coverage')
+
+            page_price, is_color_page = self.page_price(page_result, user_wants_color)
+            if is_color_page:
+                results['pricing']['color_pages_count'] += 1
+            else:
+                results['pricing']['black_pages_count'] += 1
+
+            results['pricing']['base_cost'] += page_price
+            if ink_coverage is not None:
+                results['coverage']['ink_coverage'] += ink_coverage
+                results['coverage']['measured_pages'] += 1
+            if color_coverage is not None:
+                results['coverage']['color_coverage'] += color_coverage
+            results['page_analysis'][page_num_1_based] = {
+                'is_black_only': is_black_only,
+                'final_price': page_price,
+                'method': page_result['method'],
+                'ink_coverage': ink_coverage,
+                'color_coverage': color_coverage
+            }
+        return results
+
+    def object_digest(self, pdf_document, xref: int, memo: Dict) -> str:
+        """Hash of an indirect object, with its own references replaced by their hashes."""
+        digest = memo.get(xref)
+        if digest is None:
+            # Links and annotations may point at other pages; those are not part of this page.
+            if pdf_document.xref_get_key(xref, 'Type') == ('name', '/Page'): return 'page'
+            memo[xref] = 'cycle'  # seen by reference cycles while this object is being hashed
+            source = self.resolve_references(pdf_document, pdf_document.xref_object(xref, compressed=True), memo)
+            hasher = hashlib.sha256(source.encode())
+            if pdf_document.xref_is_stream(xref): hasher.update(pdf_document.xref_stream_raw(xref))
+            digest = memo[xref] = hasher.hexdigest()
+        return digest
+
+    def resolve_references(self, pdf_document, source: str, memo: Dict) -> str:
+        source = self.BACK_REFERENCE.sub('', source)
+        return self.INDIRECT_REFERENCE.sub(
+            lambda match: '#' + self.object_digest(pdf_document, int(match.group(1)), memo), source)
+
+    def page_fingerprint(self, page, memo: Dict) -> str:
+        """
+        Hash of everything that decides how a page prints: its geometry, content stream,
+        resources and annotations. Object numbers are replaced by the hashes of the
+        objects they point to, so identical pages match within and across documents.
+        `memo` caches object hashes for one document.
+        """
+        pdf_document = page.parent
+        hasher = hashlib.sha256(f"{tuple(page.mediabox)}{tuple(page.cropbox)}{page.rotation}".encode())
+        hasher.update(page.read_contents())
+        resources = self.get_resources_source(pdf_document, page.xref)
+        hasher.update(self.resolve_references(pdf_document, resources, memo).encode())
+        for key in ('Annots', 'Group'):
+            kind, value = pdf_document.xref_get_key(page.xref, key)
+            if kind != 'null': hasher.update(self.resolve_references(pdf_document, value, memo).encode())
+        return hasher.hexdigest()
+
+    def page_fingerprints(self, pdf_path: str, pages_to_check: List[int]) -> Dict:
+        """Returns {page_num: fingerprint}; pages that cannot be fingerprinted are left out."""
+        session = get_document_session()
+        known = session.get_results(pdf_path, 'page_fingerprints')
+        fingerprints = {page: known[page] for page in pages_to_check if page in known}
+        missing = [page for page in pages_to_check if page not in known]
+        if missing:
+            with session.document(pdf_path) as pdf_document:
+                memo = {}
+                for page_num_1_based in missing:
+                    if not (1 <= page_num_1_based <= len(pdf_document)): continue
+                    try:
+                        fingerprints[page_num_1_based] = self.page_fingerprint(pdf_document[page_num_1_based - 1], memo)
+                    except Exception as e:
+                        print(f"Could not fingerprint page {page_num_1_based}: {e}")
+            session.update_results(pdf_path, 'page_fingerprints',
+                                   {page: fingerprints[page] for page in missing if page in fingerprints})
+        return fingerprints
+
+    def iter_pages_in_process(self, pdf_path: str, pages_to_check: List[int], dpi: int = None,
+                              should_stop=None):
+        """Yields (page_num, page_result) one page at a time, checking should_stop() in between."""
+        session = get_document_session()
+        for page_num_1_based in pages_to_check:
+            if should_stop and should_stop(): return
+            page_num_0_based = page_num_1_based - 1
+            # Borrowed per page so the preview threads can use the document in between
+            with session.document(pdf_path) as pdf_document:
                 if not (0 <= page_num_0_based < len(pdf_document)): continue
+                page_result = self.analyze_page(pdf_document[page_num_0_based], dpi)
+            yield page_num_1_based, page_result
 
-                page = pdf_document[page_num_0_based]
-                mat = fitz.Matrix(dpi/72, dpi/72)
-                pix = page.get_pixmap(matrix=mat, alpha=False, colorspace=fitz.csRGB)
-                page_image = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, 3)
-
-                is_black_only = self.is_page_black_only(page_image)
-                
-                page_price = 0 
-                
-                if user_wants_color and not is_black_only:
-                    page_price = self.color_price
-                    results['pricing']['color_pages_count'] += 1
-                else:
-                    page_price = self.black_price
-                    results['pricing']['black_pages_count'] += 1
-                
-                results['pricing']['base_cost'] += page_price
-                results['page_analysis'][page_num_1_based] = {'is_black_only': is_black_only, 'final_price': page_price}
+    def session_results_key(self, dpi: int = None):
+        """Key of this analyzer's per-page results in the document session; dpi None is adaptive."""
+        return ('page_analysis', self.cache_settings_key(), dpi)
+
+    def get_session_results(self, pdf_path: str, pages_to_check: List[int], dpi: int = None) -> Dict:
+        """Returns the already analyzed subset of pages_to_check from this session."""
+        known = get_document_session().get_results(pdf_path, self.session_results_key(dpi))
+        return {page: known[page] for page in pages_to_check if page in known}
+
+    def add_session_results(self, pdf_path: str, page_results: Dict, dpi: int = None):
+        get_document_session().update_results(pdf_path, self.session_results_key(dpi), page_results)
+
+    def clear_session_results(self):
+        """
+        Forget fingerprint results, e.g. when a new set of files is loaded. Per-page results
+        go with their documents when the file browser retains only the new files.
+        """
+        with self.session_lock:
+            self.fingerprint_results = {}
+
+    def get_fingerprint_results(self, fingerprints, dpi: int = None) -> Dict:
+        """Returns {fingerprint: result} for fingerprints analyzed this session or cached."""
+        with self.session_lock:
+            found = {fingerprint: self.fingerprint_results[(fingerprint, dpi)]
+                     for fingerprint in fingerprints if (fingerprint, dpi) in self.fingerprint_results}
+        missing = [fingerprint for fingerprint in fingerprints if fingerprint not in found]
+        if self.cache and missing:
+            cached_results = self.cache.get_fingerprint_results(missing, dpi or 0, self.cache_settings_key())
+            self.add_fingerprint_results(cached_results, dpi)
+            found.update(cached_results)
+        return found
+
+    def add_fingerprint_results(self, fingerprint_results: Dict, dpi: int = None):
+        with self.session_lock:
+            for fingerprint, result in fingerprint_results.items():
+                self.fingerprint_results[(fingerprint, dpi)] = result
+
+    def build_session_results(self, pdf_path: str, pages_to_check: List[int], user_wants_color: bool,
+                              dpi: int = None):
+        """Re-sums pricing from memoized pages; returns None if any page still needs analysis."""
+        page_results = self.get_session_results(pdf_path, pages_to_check, dpi)
+        if len(page_results) < len(set(pages_to_check)): return None
+        return self.build_results(page_results, pages_to_check, user_wants_color)
+
+    def analyze_pdf_pages(self, pdf_path: str, pages_to_check: List[int], user_wants_color: bool, dpi: int = None,
+                          worker_pool=None, progress_callback=None, should_stop=None, background=False) -> Dict:
+        """
+        Analyzes the selected pages and returns per-page verdicts and pricing.
+        progress_callback, if given, is called after every page with running counts and
+        the partial cost. should_stop() is checked between pages; once it returns True
+        the pages finished so far are cached and the results are marked 'cancelled'.
+        background analysis yields the worker pool to foreground renders.
+        """
+        # The cache stores adaptive-resolution results under DPI 0
+        cache_dpi = dpi or 0
+        try:
+            page_results = self.get_session_results(pdf_path, pages_to_check, dpi)
+            pages_to_analyze = [page for page in pages_to_check if page not in page_results]
+            if self.cache and pages_to_analyze:
+                file_hash = file_content_hash(pdf_path)
+                cached_results = self.cache.get_page_results(file_hash, pages_to_analyze, cache_dpi,
+                                                             self.cache_settings_key())
+                self.add_session_results(pdf_path, cached_results, dpi)
+                page_results.update(cached_results)
+
+            pages_to_analyze = [page for page in pages_to_check if page not in page_results]
+            progress = {'pages_done': 0, 'pages_total': len(pages_to_check),
+                        'black_pages_count': 0, 'color_pages_count': 0, 'partial_cost': 0.0}
+
+            def report(page_result):
+                page_price, is_color_page = self.page_price(page_result, user_wants_color)
+                progress['pages_done'] += 1
+                progress['color_pages_count' if is_color_page else 'black_pages_count'] += 1
+                progress['partial_cost'] += page_price
+
+            for page_num in pages_to_check:
+                if page_num in page_results: report(page_results[page_num])
+            if progress_callback and page_results: progress_callback(dict(progress))
 
-            pdf_document.close()
+            if pages_to_analyze:
+                # Byte-identical pages are rendered once: pages whose fingerprint is already
+                # known reuse that result, and repeats within this batch wait for the first copy.
+                fingerprints = self.page_fingerprints(pdf_path, pages_to_analyze)
+                known_results = self.get_fingerprint_results(set(fingerprints.values()), dpi)
+                new_results = {}
+                new_fingerprint_results = {}
+                copies = {}  # first page of each fingerprint -> all pages sharing it
+                first_pages = {}
+                for page_num in pages_to_analyze:
+                    fingerprint = fingerprints.get(page_num)
+                    if fingerprint in known_results:
+                        new_results[page_num] = known_results[fingerprint]
+                        report(new_results[page_num])
+                    elif fingerprint is not None and fingerprint in first_pages:
+                        copies[first_pages[fingerprint]].append(page_num)
+                    else:
+                        if fingerprint is not None: first_pages[fingerprint] = page_num
+                        copies[page_num] = [page_num]
+                if progress_callback and new_results: progress_callback(dict(progress))
+
+                pages_to_render = list(copies)
+                if worker_pool:
+                    page_iterator = worker_pool.iter_page_results(pdf_path, pages_to_render, self.worker_settings(),
+                                                                  dpi, should_stop, background)
+                else:
+                    page_iterator = self.iter_pages_in_process(pdf_path, pages_to_render, dpi, should_stop)
+                try:
+                    for page_num, page_result in page_iterator:
+                        for copy_page_num in copies[page_num]:
+                            new_results[copy_page_num] = page_result
+                            report(page_result)
+                        if page_num in fingerprints:
+                            new_fingerprint_results[fingerprints[page_num]] = page_result
+                        if progress_callback: progress_callback(dict(progress))
+                        if should_stop and should_stop(): break
+                finally:
+                    # Whatever finished is valid, even if the rest was cancelled or failed
+                    if self.cache:
+                        self.cache.put_page_results(file_hash, new_results, cache_dpi, self.cache_settings_key())
+                        self.cache.put_fingerprint_results(new_fingerprint_results, cache_dpi,
+                                                           self.cache_settings_key())
+                    self.add_session_results(pdf_path, new_results, dpi)
+                    self.add_fingerprint_results(new_fingerprint_results, dpi)
+                page_results.update(new_results)
+            results = self.build_results(page_results, pages_to_check, user_wants_color)
+            results['cancelled'] = bool(should_stop and should_stop())
             return results
         except Exception as e:
+            results = self.build_results({}, [], user_wants_color)
             results['error'] = f"Error processing PDF: {str(e)}"
             return results
 
 class AnalysisThread(QThread):
+    analysis_progress = pyqtSignal(dict)
     analysis_complete = pyqtSignal(dict)
 
-    def __init__(self, analyzer, pdf_path, selected_pages, user_wants_color):
+    def __init__(self, analyzer, pdf_path, selected_pages, user_wants_color, worker_pool=None):
         super().__init__()
         self.analyzer = analyzer
         self.pdf_path = pdf_path
         self.selected_pages = selected_pages
         self.user_wants_color = user_wants_color
+        self.worker_pool = worker_pool
         self._is_running = True
 
     def run(self):
         if not self._is_running: return
-        results = self.analyzer.analyze_pdf_pages(self.pdf_path, self.selected_pages, self.user_wants_color)
+        results = self.analyzer.analyze_pdf_pages(self.pdf_path, self.selected_pages, self.user_wants_color,
+                                                  worker_pool=self.worker_pool,
+                                                  progress_callback=self.report_progress,
+                                                  should_stop=self.is_stopped)
         if self._is_running:
             self.analysis_complete.emit(results)
+
+    def report_progress(self, progress):
+        if self._is_running:
+            self.analysis_progress.emit(progress)
+
+    def is_stopped(self):
+        return not self._is_running
     
     def stop(self):
+        """Asks the thread to finish after the page it is analyzing."""
         self._is_running = False
 
+class SpeculativeAnalysisThread(QThread):
+    """
+    Low-priority analysis started while the customer is still browsing files.
+    Results are not emitted; they land in the analyzer's cache so the Print Options
+    screen finds them already computed.
+    """
+
+    def __init__(self, analyzer, pdf_path, selected_pages, worker_pool=None):
+        super().__init__()
+        self.analyzer = analyzer
+        self.pdf_path = pdf_path
+        self.worker_pool = worker_pool
+        self._pending = list(selected_pages)
+        self._done = set()
+        self._condition = threading.Condition()
+        self._is_running = True
+
+    def set_pages(self, selected_pages):
+        """Replace the queue with the currently selected pages that are not analyzed yet."""
+        with self._condition:
+            self._pending = [page for page in selected_pages if page not in self._done]
+            self._condition.notify()
+
+    def run(self):
+        # Small batches keep the worker pool free for a foreground analysis; within a batch,
+        # pages are submitted one per worker and pause while thumbnails are rendering.
+        batch_size = self.worker_pool.processes if self.worker_pool else 1
+        while True:
+            with self._condition:
+                while self._is_running and not self._pending:
+                    self._condition.wait()
+                if not self._is_running: return
+                batch = self._pending[:batch_size]
+                del self._pending[:batch_size]
+
+            results = self.analyzer.analyze_pdf_pages(self.pdf_path, batch, True, worker_pool=self.worker_pool,
+                                                      should_stop=lambda: not self._is_running, background=True)
+            if results.get('cancelled'): return
+            if results.get('error'):
+                print(f"Speculative analysis stopped: {results['error']}")
+                return
+            with self._condition:
+                self._done.update(batch)
+
+    def stop(self):
+        with self._condition:
+            self._is_running = False
+            self._condition.notify()
+
 class Print_Options_Screen(QWidget):
+    # Longest wait for each analysis thread when the application closes
+    SHUTDOWN_WAIT_MS = 5000
+
     def __init__(self, main_app):
         super().__init__()
         self.main_app = main_app
         self.selected_pdf = None
         self.selected_pages = None
 
-        self.analyzer = PDFColorAnalyzer(black_price=3.0, color_price=5.0)
+        self.analyzer = PDFColorAnalyzer(black_price=3.0, color_price=5.0, cache=AnalysisCache())
         self.analysis_thread = None
         self.analysis_results = None
+        self.speculative_thread = None
+        self.stopping_threads = []
 
         self._copies = 1
         self._color_mode = "Black and White"
@@ -220,6 +913,16 @@ class Print_Options_Screen(QWidget):
         self.analysis_details_label.setStyleSheet("color: #36454F; font-size: 14px; margin-top: 5px;")
         layout.addWidget(self.analysis_details_label, 0, Qt.AlignHCenter)
 
+        self.analysis_progress_bar = QProgressBar()
+        self.analysis_progress_bar.setFixedWidth(360)
+        self.analysis_progress_bar.setTextVisible(False)
+        self.analysis_progress_bar.setStyleSheet("""
+            QProgressBar { background-color: #e0e0e0; border: none; border-radius: 4px; height: 8px; margin-top: 10px; }
+            QProgressBar::chunk { background-color: #1e440a; border-radius: 4px; }
+        """)
+        self.analysis_progress_bar.hide()
+        layout.addWidget(self.analysis_progress_bar, 0, Qt.AlignHCenter)
+
         layout.addStretch(2)
 
         # ---- Buttons ----
@@ -295,25 +998,45 @@ class Print_Options_Screen(QWidget):
     def trigger_analysis(self):
         if not self.selected_pdf: return
 
-        if self.analysis_thread and self.analysis_thread.isRunning():
-            self.analysis_thread.stop()
-            self.analysis_thread.wait()
+        # Switching modes must not block on the previous analysis; it stops after its current page
+        self.cancel_analysis()
 
         self.continue_btn.setEnabled(False) 
         self.analysis_results = None
+        self.analysis_progress_bar.hide()
 
         user_wants_color = (self._color_mode == "Color")
 
         if user_wants_color:
+            pdf_path = self.selected_pdf['path']
+            # Only re-sum when every selected page was already analyzed this session
+            memoized_results = self.analyzer.build_session_results(pdf_path, self.selected_pages, user_wants_color)
+            if memoized_results is not None:
+                self.on_analysis_finished(memoized_results)
+                return
+
+            # The foreground analysis takes over whatever the speculative pass has not done yet
+            self.cancel_speculative_analysis()
             self.cost_label.setText("Analyzing pages and calculating cost...")
-            self.analysis_details_label.setText("This may take a moment for large documents...")
+            self.analysis_details_label.setText(f"Analyzed 0 of {len(self.selected_pages)} pages")
+            self.analysis_progress_bar.setRange(0, len(self.selected_pages))
+            self.analysis_progress_bar.setValue(0)
+            self.analysis_progress_bar.show()
             
-            pdf_path = self.selected_pdf['path']
-            self.analysis_thread = AnalysisThread(self.analyzer, pdf_path, self.selected_pages, user_wants_color)
+            self.analysis_thread = AnalysisThread(self.analyzer, pdf_path, self.selected_pages, user_wants_color,
+                                                  worker_pool=get_worker_pool())
+            self.analysis_thread.analysis_progress.connect(self.on_analysis_progress)
             self.analysis_thread.analysis_complete.connect(self.on_analysis_finished)
             self.analysis_thread.start()
         else:
             self.cost_label.setText("Calculating cost...")
+
+            # B&W pricing needs no analysis, but a finished speculative pass also gives ink coverage
+            memoized_results = self.analyzer.build_session_results(self.selected_pdf['path'], self.selected_pages,
+                                                                   user_wants_color)
+            if memoized_results is not None:
+                self.on_analysis_finished(memoized_results)
+                return
             
             num_pages = len(self.selected_pages)
             base_cost = num_pages * self.analyzer.black_price
@@ -329,7 +1052,72 @@ class Print_Options_Screen(QWidget):
             }
             self.on_analysis_finished(bw_results)
 
+    def reset_analysis_session(self):
+        """Called by the file browser when a new set of files is loaded."""
+        self.cancel_speculative_analysis()
+        self.analyzer.clear_session_results()
+
+    def start_speculative_analysis(self, pdf_path, selected_pages):
+        """Called by the file browser as soon as a document is selected."""
+        self.cancel_speculative_analysis()
+        self.speculative_thread = SpeculativeAnalysisThread(self.analyzer, pdf_path, selected_pages,
+                                                            worker_pool=get_worker_pool())
+        self.speculative_thread.start(QThread.LowPriority)
+
+    def update_speculative_analysis(self, pdf_path, selected_pages):
+        """Called by the file browser whenever the page selection changes."""
+        thread = self.speculative_thread
+        if thread and thread.pdf_path == pdf_path and thread.isRunning():
+            thread.set_pages(selected_pages)
+        else:
+            self.start_speculative_analysis(pdf_path, selected_pages)
+
+    def cancel_speculative_analysis(self):
+        # Not waited on: the thread exits after its current page, which is harmless
+        # because finished pages only add correct entries to the cache.
+        thread = self.speculative_thread
+        self.speculative_thread = None
+        if thread and thread.isRunning():
+            thread.stop()
+            self.retire_thread(thread)
+
+    def cancel_analysis(self):
+        """Stops the foreground analysis without waiting for it; its results are dropped."""
+        thread = self.analysis_thread
+        self.analysis_thread = None
+        if thread:
+            thread.stop()
+            # Also drops signals a just-finished thread has queued but not delivered yet
+            thread.analysis_progress.disconnect()
+            thread.analysis_complete.disconnect()
+            if thread.isRunning(): self.retire_thread(thread)
+
+    def stop_analysis_threads(self):
+        """Called when the application closes: stops every analysis thread and waits for it."""
+        self.cancel_speculative_analysis()
+        self.cancel_analysis()
+        # Each stops after its current page; the worker pool must outlive the ones using it.
+        # Bounded, so a page stuck in a dead worker cannot hang the exit
+        for thread in list(self.stopping_threads):
+            if not thread.wait(self.SHUTDOWN_WAIT_MS): print("Warning: Analysis thread did not stop in time")
+
+    def retire_thread(self, thread):
+        # Keep a reference until the stopped thread has actually finished
+        self.stopping_threads.append(thread)
+        thread.finished.connect(lambda: self.stopping_threads.remove(thread))
+
+    def on_analysis_progress(self, progress):
+        self.analysis_progress_bar.setRange(0, progress['pages_total'])
+        self.analysis_progress_bar.setValue(progress['pages_done'])
+        partial_cost = progress['partial_cost'] * self._copies
+        self.cost_label.setText(f"Cost so far: ₱{partial_cost:.2f}")
+        self.analysis_details_label.setText(
+            f"Analyzed {progress['pages_done']} of {progress['pages_total']} pages "
+            f"({progress['black_pages_count']} B&W + {progress['color_pages_count']} Color so far)"
+        )
+
     def on_analysis_finished(self, results):
+        self.analysis_progress_bar.hide()
         if results.get('error'):
             self.cost_label.setText("Error during analysis!")
             self.analysis_details_label.setText(results['error'])
@@ -338,6 +1126,9 @@ class Print_Options_Screen(QWidget):
         
         self.analysis_results = results
         self.continue_btn.setEnabled(True) 
+        if self.analyzer.cache:
+            stats = self.analyzer.cache.get_stats()
+            print(f"Analysis cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} pages stored")
         self.update_cost_display()
 
     def update_cost_display(self):
@@ -387,19 +1178,11 @@ class Print_Options_Screen(QWidget):
         """Called when the print options screen is shown."""
         print("Print options screen entered")
         # Ensure analysis thread is not running from previous visits
-        if hasattr(self, 'analysis_thread') and self.analysis_thread and self.analysis_thread.isRunning():
-            print("Stopping previous analysis thread...")
-            self.analysis_thread.stop()
-            self.analysis_thread.wait(1000)
+        self.cancel_analysis()
 
     def on_leave(self):
         """Called when leaving the print options screen."""
         print("Print options screen leaving")
-        # Stop analysis thread if running
-        if hasattr(self, 'analysis_thread') and self.analysis_thread and self.analysis_thread.isRunning():
-            print("Stopping analysis thread...")
-            self.analysis_thread.stop()
-            if not self.analysis_thread.wait(2000):  # Wait up to 2 seconds
-                print("Warning: Analysis thread did not stop gracefully")
-                self.analysis_thread.terminate()
-                self.analysis_thread.wait(1000)
\ No newline at end of file
+        # Stop analysis thread if running. Never terminate it: it may hold a document or
+        # analysis cache lock, and every later user of that lock would hang
+        self.cancel_analysis()
\ No newline at end of file
@@ -103,10 +103,10 @@ class DataViewerScreen(QWidget):
 
     def refresh_transactions_table(self, table: QTableWidget):
         table.clear()
-        table.setColumnCount(9)
+        table.setColumnCount(10)
         table.setHorizontalHeaderLabels([
             "ID", "Date/Time", "File Name", "Pages", "Copies",
-            "Color Mode", "Total Cost", "Amount Paid", "Status"
+            "Color Mode", "Total Cost", "Amount Paid", "Status", "Ink Used (pages)"
         ])
         transactions = self.db_manager.get_transaction_history()
         table.setRowCount(len(transactions))
@@ -120,8 +120,19 @@ class DataViewerScreen(QWidget):
             table.setItem(i, 6, QTableWidgetItem(f"₱{trans['total_cost']:.2f}"))
             table.setItem(i, 7, QTableWidgetItem(f"₱{trans['amount_paid']:.2f}"))
             table.setItem(i, 8, QTableWidgetItem(trans['status']))
+            table.setItem(i, 9, QTableWidgetItem(self.format_ink_used(trans)))
         table.resizeColumnsToContents()
 
+    def format_ink_used(self, trans):
+        """Ink used, marked as partial when only some of the job's pages were measured."""
+        ink_coverage = trans.get('ink_coverage')
+        if ink_coverage is None: return "-"
+        measured, total = trans.get('ink_measured_pages'), trans.get('ink_total_pages')
+        # Recorded before page counts were stored, so possibly only some pages were measured
+        if measured is None or total is None: return f"≥ {ink_coverage:.2f}"
+        if measured < total: return f"≥ {ink_coverage:.2f} ({measured} of {total} pages measured)"
+        return f"{ink_coverage:.2f}"
+
     def refresh_cash_inventory_table(self, table: QTableWidget):
         table.clear()
         table.setColumnCount(4)
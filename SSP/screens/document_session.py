@@ -0,0 +1,147 @@
+# document_session.py
+
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+    import fitz  # PyMuPDF
+    PYMUPDF_AVAILABLE = True
+except ImportError:
+    PYMUPDF_AVAILABLE = False
+
+# Parsed documents kept open at once; page counts, metadata and results outlive the handle.
+MAX_OPEN_DOCUMENTS = 3
+
+class _DocumentEntry:
+    """One file of the session. `signature` detects a file replaced under the same path."""
+
+    def __init__(self, signature):
+        self.signature = signature
+        self.doc = None
+        # Reentrant so a holder can ask for the page count without deadlocking
+        self.lock = threading.RLock()
+        self.users = 0
+        self.page_count = None
+        self.metadata = None
+        # {key: {...}} computed by consumers, e.g. per-page analysis results
+        self.results = {}
+
+class DocumentSession:
+    """
+    Registry of the customer's documents for the life of a session. Every consumer in
+    the GUI process borrows the same parsed fitz.Document instead of opening the file
+    again; a borrower holds that document's lock, so one document is used by one
+    thread at a time. At most max_open_documents handles stay open, closing the least
+    recently used idle one, while page count, metadata and results are kept.
+    """
+
+    def __init__(self, max_open_documents=MAX_OPEN_DOCUMENTS):
+        self.max_open_documents = max_open_documents
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _signature(self, pdf_path):
+        stat = os.stat(pdf_path)
+        return (stat.st_size, stat.st_mtime_ns)
+
+    def _get_entry(self, pdf_path, use=False):
+        """Returns the entry for pdf_path, replacing it if the file changed. Caller holds self.lock."""
+        key = os.path.abspath(pdf_path)
+        signature = self._signature(pdf_path)
+        entry = self.entries.get(key)
+        if entry is None or entry.signature != signature:
+            if entry is not None:
+                del self.entries[key]
+                self._close_entry(entry)
+            entry = _DocumentEntry(signature)
+            self.entries[key] = entry
+        self.entries.move_to_end(key)
+        if use: entry.users += 1
+        return entry
+
+    def _close_entry(self, entry):
+        """Closes the handle unless a borrower still has it; that borrower closes it on return."""
+        if entry.users == 0 and entry.doc is not None:
+            entry.doc.close()
+            entry.doc = None
+
+    def _close_idle_documents(self):
+        """Caller holds self.lock."""
+        open_entries = [entry for entry in self.entries.values() if entry.doc is not None]
+        for entry in open_entries:
+            if len(open_entries) <= self.max_open_documents: break
+            if entry.users == 0:
+                self._close_entry(entry)
+                open_entries.remove(entry)
+
+    @contextmanager
+    def document(self, pdf_path):
+        """Yields the open document for pdf_path, holding it for this thread until the block ends."""
+        with self.lock:
+            entry = self._get_entry(pdf_path, use=True)
+        try:
+            with entry.lock:
+                if entry.doc is None:
+                    entry.doc = fitz.open(pdf_path)
+                    entry.page_count = len(entry.doc)
+                    entry.metadata = dict(entry.doc.metadata or {})
+                yield entry.doc
+        finally:
+            with self.lock:
+                entry.users -= 1
+                if entry not in self.entries.values(): self._close_entry(entry)
+                self._close_idle_documents()
+
+    def page_count(self, pdf_path):
+        """Number of pages; parsed once per file, then answered without the document."""
+        with self.lock:
+            entry = self._get_entry(pdf_path)
+        if entry.page_count is not None: return entry.page_count
+        with self.document(pdf_path) as doc: return len(doc)
+
+    def metadata(self, pdf_path):
+        """The document's metadata dict (title, author, ...)."""
+        with self.lock:
+            entry = self._get_entry(pdf_path)
+        if entry.metadata is not None: return dict(entry.metadata)
+        with self.document(pdf_path) as doc: return dict(doc.metadata or {})
+
+    def get_results(self, pdf_path, key):
+        """Returns a copy of the results stored under key, or {} if there are none."""
+        try:
+            with self.lock:
+                return dict(self._get_entry(pdf_path).results.get(key, {}))
+        except OSError:
+            return {}
+
+    def update_results(self, pdf_path, key, values):
+        """Merges the dict `values` into the results stored under key."""
+        try:
+            with self.lock:
+                self._get_entry(pdf_path).results.setdefault(key, {}).update(values)
+        except OSError as e:
+            print(f"Could not store results for {pdf_path}: {e}")
+
+    def retain(self, pdf_paths):
+        """Forgets every document not in pdf_paths, e.g. when a new set of files is loaded."""
+        keep = {os.path.abspath(path) for path in pdf_paths}
+        with self.lock:
+            for key in [key for key in self.entries if key not in keep]:
+                self._close_entry(self.entries.pop(key))
+
+    def close_all(self):
+        """Ends the session: closes every idle handle and forgets all documents."""
+        self.retain([])
+
+# Global document session instance, created at import so threads never race to create it
+document_session = DocumentSession()
+
+def get_document_session():
+    """Get the global document session."""
+    return document_session
+
+def cleanup_document_session():
+    """Close all documents of the global session."""
+    document_session.close_all()
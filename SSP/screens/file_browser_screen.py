@@ -1,11 +1,18 @@
 import os
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QScrollArea,
-    QFrame, QMessageBox, QGridLayout, QCheckBox, QSizePolicy, QStackedLayout, QSpacerItem
+    QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
+    QFrame, QMessageBox, QGridLayout, QCheckBox, QSizePolicy, QStackedLayout, QSpacerItem,
+    QAbstractScrollArea, QScroller, QListView, QAbstractItemView, QStyledItemDelegate, QStyle, QLineEdit
 )
-from PyQt5.QtCore import Qt, pyqtSignal, QThread
-from PyQt5.QtGui import QPixmap, QImage
+from PyQt5.QtCore import Qt, pyqtSignal, QThread, QAbstractListModel, QModelIndex, QSize, QRectF
+from PyQt5.QtGui import QPixmap, QImage, QPainter, QPen, QColor, QFont, QFontMetrics
 from screens.pdf_preview_widget import PDFPreviewWidget
+from screens.thumbnail_cache import ThumbnailCache
+from screens.document_session import get_document_session
+from screens.page_selection import PageSelection
+from screens.pdf_file_index import PDFFileIndex
+from screens.worker_pool import get_worker_pool, render_page_pixmap
+from database.analysis_cache import file_content_hash, known_content_hash
 
 try:
     import fitz  # PyMuPDF
@@ -29,58 +36,130 @@ except ImportError:
 def get_base_dir():
     return os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 
-class PDFButton(QPushButton):
-    pdf_selected = pyqtSignal(dict)
-    def __init__(self, pdf_data):
-        super().__init__()
-        self.pdf_data = pdf_data
-        self.is_selected = False
-        filename = pdf_data['filename']
-        size_mb = pdf_data.get('size', 0) / (1024 * 1024)
-        pages = pdf_data.get('pages', 1)
-        self.setText(f"📄 {filename}\n({size_mb:.1f}MB, ~{pages} pages)")
-        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Preferred)
-        self.setStyleSheet(self.get_normal_style())
-        self.clicked.connect(self.on_click)
-        self.setMinimumWidth(300)
-        self.setFixedHeight(60)
-
-    def get_normal_style(self):
-        return """
-            QPushButton {
-                background-color: #1e440a; color: #fff; border: 1px solid #555;
-                border-radius: 8px; padding: 10px; text-align: left;
-                font-size: 13px; margin: 2px; height: 60px;
-            }
-            QPushButton:hover { background-color: #2a5d1a; border: 1px solid #36454F; }
-        """
-
-    def get_selected_style(self):
-        return """
-            QPushButton {
-                background-color: #4d80cc; color: #fff; border: 3px solid #6699ff;
-                border-radius: 8px; padding: 10px; text-align: left;
-                font-size: 13px; font-weight: bold; margin: 2px; height: 60px;
-            }
-        """
-
-    def on_click(self): self.pdf_selected.emit(self.pdf_data)
-    def set_selected(self, selected):
-        self.is_selected = selected
-        if selected: self.setStyleSheet(self.get_selected_style())
-        else: self.setStyleSheet(self.get_normal_style())
+def render_page_image(page, size, aa_level=None):
+    """Renders the page straight at the scale that fits `size`, as a QImage that owns its pixels."""
+    pix = render_page_pixmap(page, size, aa_level)
+    # Wraps the samples without copying; copy() then detaches the image from the pixmap
+    samples = pix.samples_mv if hasattr(pix, 'samples_mv') else pix.samples
+    return QImage(samples, pix.width, pix.height, pix.stride, QImage.Format_RGB888).copy()
+
+def read_embedded_thumbnail(doc, page, size):
+    """
+    Decodes the page's /Thumb image scaled to fit `size`, or returns None if there is none.
+    Also returns whether it is sharp enough to stand in for a render at that size.
+    """
+    # Whether /Thumb includes the page rotation varies between producers
+    if page.rotation: return None, False
+    kind, value = doc.xref_get_key(page.xref, 'Thumb')
+    if kind != 'xref': return None, False
+    pix = fitz.Pixmap(doc, int(value.split()[0]))
+    if pix.alpha: pix = fitz.Pixmap(pix, 0)
+    if pix.n != 3: pix = fitz.Pixmap(fitz.csRGB, pix)
+    samples = pix.samples_mv if hasattr(pix, 'samples_mv') else pix.samples
+    image = QImage(samples, pix.width, pix.height, pix.stride, QImage.Format_RGB888)
+    # scaled() returns a new image, detached from the pixmap's samples
+    fitted = image.scaled(size[0], size[1], Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    sharp = fitted.width() <= pix.width * PDFPreviewThread.EMBEDDED_THUMBNAIL_MAX_UPSCALE
+    return fitted, sharp
+
+def render_pages_in_workers(pdf_path, pages, size, aa_level=None, should_stop=None, background=False):
+    """
+    Yields (page_num, QImage or None, error) for pages rendered in parallel by the worker
+    pool. The image is copied once out of the worker's shared memory slot. Background
+    renders give way to the others.
+    """
+    for rendered in get_worker_pool().iter_rendered_pages(pdf_path, pages, size, aa_level, should_stop, background):
+        if rendered.error: yield rendered.page_num, None, rendered.error; continue
+        image = QImage(rendered.samples, rendered.width, rendered.height, rendered.stride, QImage.Format_RGB888).copy()
+        yield rendered.page_num, image, None
+
+def file_label_lines(pdf_data):
+    size_mb = pdf_data.get('size', 0) / (1024 * 1024)
+    return pdf_data['filename'], f"({size_mb:.1f}MB, ~{pdf_data.get('pages', 1)} pages)"
+
+class PDFFileListModel(QAbstractListModel):
+    """
+    The file list's rows, in the order and with the filter of a PDFFileIndex. Rows are
+    handed to the view FETCH_BATCH at a time as it scrolls (canFetchMore/fetchMore), and
+    the view paints only the rows in sight, so the list opens at once on any drive.
+    """
+    FETCH_BATCH = 40
+    FILE_ROLE = Qt.UserRole
+    SELECTED_ROLE = Qt.UserRole + 1
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.file_index = PDFFileIndex(); self.loaded = 0; self.selected_path = None
+    def rowCount(self, parent=QModelIndex()): return 0 if parent.isValid() else self.loaded
+    def canFetchMore(self, parent=QModelIndex()): return not parent.isValid() and self.loaded < len(self.file_index)
+    def fetchMore(self, parent=QModelIndex()):
+        count = min(self.FETCH_BATCH, len(self.file_index) - self.loaded)
+        if parent.isValid() or count <= 0: return
+        self.beginInsertRows(QModelIndex(), self.loaded, self.loaded + count - 1); self.loaded += count; self.endInsertRows()
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= self.loaded: return None
+        pdf_data = self.file_index[index.row()]
+        if role == Qt.DisplayRole: return "📄 " + "\n".join(file_label_lines(pdf_data))
+        if role == self.FILE_ROLE: return pdf_data
+        if role == self.SELECTED_ROLE: return pdf_data['path'] == self.selected_path
+        return None
+    def update_rows(self, change):
+        """Applies a change to the index, then shows the first batch of the new rows."""
+        self.beginResetModel(); change(); self.loaded = min(len(self.file_index), self.FETCH_BATCH); self.endResetModel()
+    def set_files(self, files): self.update_rows(lambda: setattr(self, 'file_index', PDFFileIndex(files)))
+    def set_filter(self, text): self.update_rows(lambda: self.file_index.set_filter(text))
+    def set_sort(self, sort_key, descending=False): self.update_rows(lambda: self.file_index.set_sort(sort_key, descending))
+    def set_selected_path(self, path):
+        previous = self.selected_path; self.selected_path = path
+        for changed in {previous, path}:
+            row = self.file_index.row_of(changed)
+            if row is not None and row < self.loaded: self.dataChanged.emit(self.index(row), self.index(row), [self.SELECTED_ROLE])
+    def ensure_loaded(self, row):
+        while self.loaded <= row and self.canFetchMore(): self.fetchMore()
+
+class PDFFileDelegate(QStyledItemDelegate):
+    """Paints a file row in the style of the file buttons it replaces, without a widget per file."""
+    ROW_HEIGHT = 60
+    SPACING = 6
+    def sizeHint(self, option, index): return QSize(300, self.ROW_HEIGHT + self.SPACING)
+    def paint(self, painter, option, index):
+        pdf_data = index.data(PDFFileListModel.FILE_ROLE)
+        if pdf_data is None: return
+        selected = bool(index.data(PDFFileListModel.SELECTED_ROLE)); hovered = bool(option.state & QStyle.State_MouseOver)
+        if selected: background, border, border_width = "#4d80cc", "#6699ff", 3
+        elif hovered: background, border, border_width = "#2a5d1a", "#36454F", 1
+        else: background, border, border_width = "#1e440a", "#555", 1
+        rect = option.rect.adjusted(2, self.SPACING // 2, -2, -(self.SPACING // 2))
+        painter.save(); painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(QPen(QColor(border), border_width)); painter.setBrush(QColor(background))
+        inset = border_width / 2
+        painter.drawRoundedRect(QRectF(rect).adjusted(inset, inset, -inset, -inset), 8, 8)
+        font = QFont(option.font); font.setPixelSize(13); font.setBold(selected); painter.setFont(font)
+        metrics = QFontMetrics(font); text_rect = rect.adjusted(10, 0, -10, 0)
+        filename, details = file_label_lines(pdf_data)
+        # Long names keep their start and their ending (often a version or date)
+        icon = "📄 "; filename = metrics.elidedText(filename, Qt.ElideMiddle, text_rect.width() - metrics.horizontalAdvance(icon))
+        painter.setPen(QColor("#fff")); painter.drawText(text_rect, Qt.AlignLeft | Qt.AlignVCenter, f"{icon}{filename}\n{details}")
+        painter.restore()
 
 class PDFPageWidget(QFrame):
+    WIDTH = 150
+    HEIGHT = 210
+    NORMAL_STYLE = "QFrame { background-color: white; border: 2px solid #ddd; border-radius: 8px; margin: 4px; }"
+    CHECKED_STYLE = "QFrame { background-color: white; border: 3px solid #4CAF50; border-radius: 8px; margin: 4px; }"
+    UNCHECKED_STYLE = "QFrame { background-color: #f5f5f5; border: 2px solid #ccc; border-radius: 8px; margin: 4px; }"
+    LABEL_STYLE = "QLabel { background-color: #f9f9f9; border: 1px solid #ddd; border-radius: 4px; color: #36454F; font-size: 10px; }"
+    ERROR_LABEL_STYLE = "QLabel { background-color: #ffeeee; border: 1px solid #ffaaaa; border-radius: 4px; color: #cc0000; font-size: 9px; }"
     page_selected = pyqtSignal(int)
     page_checkbox_clicked = pyqtSignal(int, bool)
-    def __init__(self, page_num=1, checked=True):
-        super().__init__()
+    def __init__(self, page_num=1, checked=True, parent=None):
+        super().__init__(parent)
         self.page_num = page_num
-        self.setFixedSize(150, 210)
+        self.frame_style = None; self.label_style = None
+        self.setFixedSize(self.WIDTH, self.HEIGHT)
         self.setup_ui(checked)
         
     def setup_ui(self, checked):
-        self.setStyleSheet("QFrame { background-color: white; border: 2px solid #ddd; border-radius: 8px; margin: 4px; }")
+        self.set_frame_style(self.NORMAL_STYLE)
         layout = QVBoxLayout(self)
         layout.setContentsMargins(5, 5, 5, 5)
         layout.setSpacing(4)
@@ -96,7 +175,7 @@ class PDFPageWidget(QFrame):
         self.preview_label = QLabel()
         self.preview_label.setAlignment(Qt.AlignCenter)
         self.preview_label.setMinimumHeight(160)
-        self.preview_label.setStyleSheet("QLabel { background-color: #f9f9f9; border: 1px solid #ddd; border-radius: 4px; color: #36454F; font-size: 10px; }")
+        self.set_label_style(self.LABEL_STYLE)
         self.preview_label.setText(f"Loading\nPage {self.page_num}...")
         layout.addWidget(self.checkbox)
         layout.addWidget(self.preview_label)
@@ -107,21 +186,111 @@ class PDFPageWidget(QFrame):
         
     def on_checkbox_clicked(self, checked):
         self.page_checkbox_clicked.emit(self.page_num, checked)
-        if checked: self.setStyleSheet("QFrame { background-color: white; border: 3px solid #4CAF50; border-radius: 8px; margin: 4px; }")
-        else: self.setStyleSheet("QFrame { background-color: #f5f5f5; border: 2px solid #ccc; border-radius: 8px; margin: 4px; }")
+        self.set_frame_style(self.CHECKED_STYLE if checked else self.UNCHECKED_STYLE)
+
+    # Style sheets are only re-applied when they change; each call re-polishes the widget tree
+    def set_frame_style(self, style):
+        if style != self.frame_style: self.frame_style = style; self.setStyleSheet(style)
+    def set_label_style(self, style):
+        if style != self.label_style: self.label_style = style; self.preview_label.setStyleSheet(style)
+
+    def bind(self, page_num, checked):
+        """Shows another page in this tile; grid navigation rebinds tiles instead of rebuilding them."""
+        self.page_num = page_num
+        self.checkbox.setText(f"Page {page_num}"); self.checkbox.setChecked(checked)
+        self.set_frame_style(self.NORMAL_STYLE); self.set_label_style(self.LABEL_STYLE)
+        self.preview_label.clear(); self.preview_label.setText(f"Loading\nPage {page_num}...")
         
     def set_preview_image(self, pixmap):
         self.preview_label.clear(); self.preview_label.setAlignment(Qt.AlignCenter); self.preview_label.setPixmap(pixmap)
         
     def set_error_message(self, error_msg):
         self.preview_label.setText(f"Page {self.page_num}\n\nError:\n{error_msg}")
-        self.preview_label.setStyleSheet("QLabel { background-color: #ffeeee; border: 1px solid #ffaaaa; border-radius: 4px; color: #cc0000; font-size: 9px; }")
+        self.set_label_style(self.ERROR_LABEL_STYLE)
+
+class VirtualPageGrid(QAbstractScrollArea):
+    """
+    Continuous-scroll grid of every page of a document. Tiles exist only for the rows in
+    view plus one; page n always lands in tile (n - 1) % len(tiles), so scrolling by a row
+    rebinds one row of tiles and moves the rest. visible_pages_changed tells the screen
+    which pages need thumbnails.
+    """
+    COLUMNS = 3
+    SPACING = 5
+    visible_pages_changed = pyqtSignal(list)
+    page_selected = pyqtSignal(int)
+    page_checkbox_clicked = pyqtSignal(int, bool)
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.tiles = []; self.page_count = 0; self.is_checked = lambda page_num: True; self.visible_pages = []
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.setFrameShape(QFrame.NoFrame)
+        # Drag to scroll on the touchscreen; taps still reach the tiles
+        QScroller.grabGesture(self.viewport(), QScroller.LeftMouseButtonGesture)
+    def row_height(self): return PDFPageWidget.HEIGHT + self.SPACING
+    def set_pages(self, page_count, is_checked, first_page=1):
+        """Shows page_count pages, scrolled so first_page's row is at the top."""
+        self.page_count = page_count; self.is_checked = is_checked; self.visible_pages = []
+        # Force every tile to be rebound, even to the same page number
+        for tile in self.tiles: tile.page_num = None
+        self.update_scroll_range()
+        self.verticalScrollBar().setValue((first_page - 1) // self.COLUMNS * self.row_height())
+        self.layout_tiles()
+    def refresh_checkboxes(self):
+        for tile in self.tiles:
+            if tile.page_num is not None: tile.checkbox.setChecked(self.is_checked(tile.page_num))
+    def visible_tiles(self): return [tile for tile in self.tiles if tile.page_num in self.visible_pages]
+    def update_scroll_range(self):
+        rows = (self.page_count + self.COLUMNS - 1) // self.COLUMNS
+        scroll_bar = self.verticalScrollBar(); view_height = self.viewport().height()
+        scroll_bar.setRange(0, max(0, rows * self.row_height() - view_height))
+        scroll_bar.setPageStep(view_height); scroll_bar.setSingleStep(self.row_height() // 4)
+    def resizeEvent(self, event):
+        super().resizeEvent(event); self.update_scroll_range(); self.layout_tiles()
+    def scrollContentsBy(self, dx, dy): self.layout_tiles()
+    def layout_tiles(self):
+        row_height = self.row_height(); offset = self.verticalScrollBar().value()
+        rows = self.viewport().height() // row_height + 2
+        tile_count = rows * self.COLUMNS
+        if len(self.tiles) != tile_count:
+            # Only happens when the viewport changes size; the ring mapping changes with it
+            while len(self.tiles) < tile_count:
+                tile = PDFPageWidget(parent=self.viewport()); tile.hide()
+                tile.page_selected.connect(self.page_selected); tile.page_checkbox_clicked.connect(self.page_checkbox_clicked)
+                self.tiles.append(tile)
+            for tile in self.tiles[tile_count:]: tile.deleteLater()
+            del self.tiles[tile_count:]
+            for tile in self.tiles: tile.page_num = None
+        first_row = offset // row_height
+        left = (self.viewport().width() - (self.COLUMNS * PDFPageWidget.WIDTH + (self.COLUMNS - 1) * self.SPACING)) // 2
+        first_page = first_row * self.COLUMNS + 1
+        pages = list(range(first_page, min(self.page_count, first_page + tile_count - 1) + 1))
+        used = set()
+        for page_num in pages:
+            index = (page_num - 1) % tile_count; tile = self.tiles[index]; used.add(index)
+            if tile.page_num != page_num: tile.bind(page_num, self.is_checked(page_num))
+            row, column = divmod(page_num - 1, self.COLUMNS)
+            tile.move(left + column * (PDFPageWidget.WIDTH + self.SPACING), row * row_height - offset)
+            if not tile.isVisible(): tile.show()
+        for index, tile in enumerate(self.tiles):
+            if index not in used and tile.isVisible(): tile.hide()
+        # Pages at least partly inside the viewport
+        view_height = self.viewport().height()
+        visible = [page_num for page_num in pages if ((page_num - 1) // self.COLUMNS) * row_height - offset < view_height]
+        if visible != self.visible_pages:
+            self.visible_pages = visible; self.visible_pages_changed.emit(visible)
 
 class PDFPreviewThread(QThread):
-    preview_ready = pyqtSignal(int, QPixmap)
+    THUMBNAIL_SIZE = (130, 170)
+    # MuPDF anti-aliasing bits for thumbnails (default 8); 4 is indistinguishable at this size
+    THUMBNAIL_AA_LEVEL = 4
+    # An embedded /Thumb enlarged by no more than this is kept instead of rendering the page
+    EMBEDDED_THUMBNAIL_MAX_UPSCALE = 1.1
+    # QImage rather than QPixmap: pixmaps may only be created on the GUI thread
+    preview_ready = pyqtSignal(int, QImage)
     error_occurred = pyqtSignal(int, str)
-    def __init__(self, pdf_path, pages_to_render: list):
-        super().__init__(); self.pdf_path = pdf_path; self.pages_to_render = pages_to_render; self.running = True
+    def __init__(self, pdf_path, pages_to_render: list, thumbnail_cache=None):
+        super().__init__(); self.pdf_path = pdf_path; self.pages_to_render = pages_to_render; self.thumbnail_cache = thumbnail_cache; self.running = True
     def run(self):
         if not PYMUPDF_AVAILABLE:
             for page_num in self.pages_to_render:
@@ -129,36 +298,132 @@ class PDFPreviewThread(QThread):
                 self.error_occurred.emit(page_num, "PyMuPDF not available")
             return
         try:
-            doc = fitz.open(self.pdf_path)
+            session = get_document_session()
+            doc_hash = file_content_hash(self.pdf_path) if self.thumbnail_cache else None
+            pages_to_render = []
             for page_num in self.pages_to_render:
+                if not self.running: break
+                image = self.thumbnail_cache.get(doc_hash, page_num, self.THUMBNAIL_SIZE) if self.thumbnail_cache else None
+                if image is not None: self.preview_ready.emit(page_num, image)
+                else: pages_to_render.append(page_num)
+            if pages_to_render: pages_to_render = self.show_embedded_thumbnails(session, doc_hash, pages_to_render)
+            if get_worker_pool() and len(pages_to_render) > 1:
+                # Cache misses render in parallel, one page per worker
+                rendered = render_pages_in_workers(self.pdf_path, pages_to_render, self.THUMBNAIL_SIZE, self.THUMBNAIL_AA_LEVEL, lambda: not self.running)
+                for page_num, image, error in rendered:
+                    if error: self.error_occurred.emit(page_num, error); continue
+                    if self.thumbnail_cache: self.thumbnail_cache.put(doc_hash, page_num, self.THUMBNAIL_SIZE, image)
+                    if self.running: self.preview_ready.emit(page_num, image)
+                return
+            for page_num in pages_to_render:
                 if not self.running: break
                 try:
-                    page = doc[page_num - 1]
-                    pix = page.get_pixmap(matrix=fitz.Matrix(1.2, 1.2))
-                    qimg = QImage.fromData(pix.tobytes("ppm"))
-                    pixmap = QPixmap.fromImage(qimg).scaled(130, 170, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                    self.preview_ready.emit(page_num, pixmap)
+                    # Borrowed per page so other threads can use the document in between
+                    with session.document(self.pdf_path) as doc: image = self.render_thumbnail(doc[page_num - 1])
+                    if self.thumbnail_cache: self.thumbnail_cache.put(doc_hash, page_num, self.THUMBNAIL_SIZE, image)
+                    self.preview_ready.emit(page_num, image)
                 except Exception as e: self.error_occurred.emit(page_num, str(e))
-            doc.close()
         except Exception as e:
             err_page = self.pages_to_render[0] if self.pages_to_render else 1
             self.error_occurred.emit(err_page, f"Failed to open PDF: {str(e)}")
+    def show_embedded_thumbnails(self, session, doc_hash, pages):
+        """
+        First paint from the thumbnails stored in the PDF. Returns the pages that still
+        need a render: those without one, or whose thumbnail is too small to keep.
+        """
+        pages_to_render = []
+        with session.document(self.pdf_path) as doc:
+            for page_num in pages:
+                if not self.running: break
+                try: image, sharp = read_embedded_thumbnail(doc, doc[page_num - 1], self.THUMBNAIL_SIZE)
+                except Exception as e: image, sharp = None, False; print(f"Ignoring embedded thumbnail of page {page_num}: {e}")
+                if image is not None: self.preview_ready.emit(page_num, image)
+                if sharp and self.thumbnail_cache: self.thumbnail_cache.put(doc_hash, page_num, self.THUMBNAIL_SIZE, image)
+                if not sharp: pages_to_render.append(page_num)
+        return pages_to_render
+    def render_thumbnail(self, page): return render_page_image(page, self.THUMBNAIL_SIZE, self.THUMBNAIL_AA_LEVEL)
+    def stop(self): self.running = False
+
+class PreviewPrefetchThread(QThread):
+    """
+    Renders what the user is likely to look at next into the thumbnail cache: single-page
+    views, then thumbnails of the grid pages around the current one. Started at idle
+    priority and emits nothing; show_pdf_preview and show_single_page find the results in
+    the cache. Pages are rendered in the worker pool when it runs, as background renders.
+    """
+    def __init__(self, pdf_path, thumbnail_pages, view_pages, view_size, thumbnail_cache):
+        super().__init__(); self.pdf_path = pdf_path; self.thumbnail_cache = thumbnail_cache; self.running = True
+        self.jobs = [(view_size, None, view_pages), (PDFPreviewThread.THUMBNAIL_SIZE, PDFPreviewThread.THUMBNAIL_AA_LEVEL, thumbnail_pages)]
+    def run(self):
+        try:
+            session = get_document_session(); doc_hash = file_content_hash(self.pdf_path); page_count = session.page_count(self.pdf_path)
+            for size, aa_level, pages in self.jobs:
+                if not self.running: break
+                pages = [page_num for page_num in pages if 1 <= page_num <= page_count and not self.thumbnail_cache.contains(doc_hash, page_num, size)]
+                if get_worker_pool() and len(pages) > 1:
+                    for page_num, image, error in render_pages_in_workers(self.pdf_path, pages, size, aa_level, lambda: not self.running, background=True):
+                        if image is not None: self.thumbnail_cache.put(doc_hash, page_num, size, image)
+                    continue
+                for page_num in pages:
+                    if not self.running: break
+                    with session.document(self.pdf_path) as doc: image = render_page_image(doc[page_num - 1], size, aa_level)
+                    self.thumbnail_cache.put(doc_hash, page_num, size, image)
+        except Exception as e: print(f"Preview prefetch stopped: {e}")
+    def stop(self): self.running = False
+
+class SinglePageRenderThread(QThread):
+    """
+    Renders one page for the single-page view at each requested size, smallest first,
+    emitting every image as soon as it is ready. `generation` identifies the request so
+    results for a page the user has already left can be ignored.
+    """
+    image_ready = pyqtSignal(int, int, QImage)
+    def __init__(self, pdf_path, page_num, sizes, generation, thumbnail_cache):
+        super().__init__(); self.pdf_path = pdf_path; self.page_num = page_num; self.generation = generation
+        self.sizes = sizes; self.thumbnail_cache = thumbnail_cache; self.running = True
+    def run(self):
+        try:
+            session = get_document_session(); doc_hash = file_content_hash(self.pdf_path)
+            for size, cache_result in self.sizes:
+                if not self.running: break
+                image = self.thumbnail_cache.get(doc_hash, self.page_num, size) if cache_result else None
+                if image is None:
+                    with session.document(self.pdf_path) as doc:
+                        if not (1 <= self.page_num <= len(doc)): break
+                        image = render_page_image(doc[self.page_num - 1], size)
+                    if cache_result: self.thumbnail_cache.put(doc_hash, self.page_num, size, image)
+                if self.running: self.image_ready.emit(self.generation, self.page_num, image)
+        except Exception as e: print(f"Error rendering page {self.page_num}: {e}")
     def stop(self): self.running = False
 
 class FileBrowserScreen(QWidget):
     SINGLE_PAGE_PREVIEW_WIDTH = 280
     SINGLE_PAGE_PREVIEW_HEIGHT = 380
+    # The single-page view is rendered at its on-screen size; zoomed views are drawn from tiles
     ITEMS_PER_GRID_PAGE = 6
+    # Show all pages in one scrolling grid instead of pages of ITEMS_PER_GRID_PAGE
+    CONTINUOUS_SCROLL_GRID = False
+    # Grid pages on each side of the current one whose thumbnails are prefetched
+    PREFETCH_GRID_PAGES = 3
+    # Longest wait for each render thread when the application closes
+    SHUTDOWN_WAIT_MS = 5000
 
     def __init__(self, main_app):
         super().__init__()
         self.main_app = main_app
         try: self.usb_manager = main_app.usb_screen.usb_manager
         except Exception: self.usb_manager = USBFileManager()
-        self.pdf_files_data = []; self.selected_pdf = None; self.pdf_buttons = []
+        self.pdf_files_data = []; self.selected_pdf = None
         self.page_widgets = []; self.page_widget_map = {}; self.selected_pages = None
         self.pdf_page_selections = {}; self.preview_thread = None; self.restore_payment_data = None
+        self.prefetch_thread = None; self.stopping_threads = []
+        self.single_page_threads = []; self.single_page_generation = 0
+        # The grid's page tiles are created once and rebound on every grid page
+        self.grid_tiles = []
         self.view_mode = 'all'; self.single_page_index = 1; self.current_grid_page = 1
+        # Thumbnails seen this session, on disk in the session temp folder as well as in memory
+        thumbnail_dir = getattr(self.usb_manager, 'destination_dir', None)
+        self.thumbnail_cache = ThumbnailCache(os.path.join(thumbnail_dir, 'thumbnails') if thumbnail_dir else None)
         self.setup_ui()
 
     def setup_ui(self):
@@ -198,21 +463,57 @@ class FileBrowserScreen(QWidget):
         self.file_header.setStyleSheet("QLabel { color: #36454F; font-size: 16px; font-weight: bold; background-color: transparent; padding-left: 13px;}")
         self.file_header.setFixedHeight(32)
         left_layout.addWidget(self.file_header, 0, Qt.AlignLeft)
-        file_scroll = QScrollArea()
-        file_scroll.setWidgetResizable(True)
-        file_scroll.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-        file_scroll.setStyleSheet("""
-            QScrollArea { border: none; background-color: transparent; }
+        self.file_search_input = QLineEdit()
+        self.file_search_input.setPlaceholderText("Search files")
+        self.file_search_input.setClearButtonEnabled(True)
+        self.file_search_input.setFixedHeight(36)
+        self.file_search_input.setStyleSheet("""
+            QLineEdit {
+                background-color: #fff; color: #36454F; font-size: 13px;
+                border: 1px solid #555; border-radius: 8px; padding: 4px 10px; margin: 0 2px;
+            }
+            QLineEdit:focus { border: 2px solid #1e440a; }
+        """)
+        self.file_search_input.textChanged.connect(self.filter_files)
+        left_layout.addWidget(self.file_search_input)
+        sort_row = QHBoxLayout()
+        sort_row.setSpacing(6)
+        sort_row.setContentsMargins(2, 0, 2, 0)
+        sort_button_style = """
+            QPushButton {
+                color: white; font-size: 12px; font-weight: bold;
+                border: none; border-radius: 4px; height: 32px;
+                background-color: #555;
+            }
+            QPushButton:checked { background-color: #1e440a; }
+        """
+        self.file_sort_buttons = {}
+        for sort_key, label in (('name', "Name"), ('size', "Size"), ('pages', "Pages")):
+            sort_btn = QPushButton(label); sort_btn.setCheckable(True)
+            sort_btn.setStyleSheet(sort_button_style); sort_btn.setFixedHeight(32)
+            sort_btn.clicked.connect(lambda checked, sort_key=sort_key: self.sort_files(sort_key))
+            self.file_sort_buttons[sort_key] = sort_btn; sort_row.addWidget(sort_btn)
+        left_layout.addLayout(sort_row)
+        # Rows are painted by the delegate and created only as the list scrolls
+        self.file_list_model = PDFFileListModel(self)
+        self.file_list_view = QListView()
+        self.file_list_view.setModel(self.file_list_model)
+        self.file_list_view.setItemDelegate(PDFFileDelegate(self.file_list_view))
+        self.file_list_view.setUniformItemSizes(True)
+        self.file_list_view.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.file_list_view.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.file_list_view.setSelectionMode(QAbstractItemView.NoSelection)
+        self.file_list_view.setFocusPolicy(Qt.NoFocus)
+        self.file_list_view.setMouseTracking(True)
+        self.file_list_view.setStyleSheet("""
+            QListView { border: none; background-color: transparent; }
             QScrollBar:vertical { background-color: #333; width: 12px; border-radius: 6px; }
             QScrollBar::handle:vertical { background-color: #666; border-radius: 6px; min-height: 20px; }
         """)
-        self.file_list_widget = QWidget()
-        self.file_list_widget.setStyleSheet("background-color: transparent;")
-        self.file_list_layout = QVBoxLayout(self.file_list_widget)
-        self.file_list_layout.setSpacing(6)
-        self.file_list_layout.addStretch()
-        file_scroll.setWidget(self.file_list_widget)
-        left_layout.addWidget(file_scroll)
+        QScroller.grabGesture(self.file_list_view.viewport(), QScroller.LeftMouseButtonGesture)
+        self.file_list_view.clicked.connect(self.on_file_clicked)
+        self.update_sort_buttons()
+        left_layout.addWidget(self.file_list_view)
         split_row.addWidget(left_panel)
 
         # RIGHT PANEL
@@ -367,6 +668,12 @@ class FileBrowserScreen(QWidget):
         preview_area_layout.addWidget(self.preview_container)
         preview_area_layout.addWidget(self.single_page_widget)
         self.single_page_widget.hide()
+        self.page_scroll_grid = VirtualPageGrid()
+        self.page_scroll_grid.setStyleSheet("QAbstractScrollArea { border: 2px solid #0f1f00; border-radius: 6px; background-color: #ffffff; }")
+        self.page_scroll_grid.page_selected.connect(self.on_page_widget_clicked); self.page_scroll_grid.page_checkbox_clicked.connect(self.on_page_selected)
+        self.page_scroll_grid.visible_pages_changed.connect(self.on_visible_pages_changed)
+        preview_area_layout.addWidget(self.page_scroll_grid)
+        self.page_scroll_grid.hide()
 
         right_panel_layout.addLayout(header_row)
         right_panel_layout.addLayout(preview_area_layout, 1)
@@ -379,56 +686,145 @@ class FileBrowserScreen(QWidget):
         self.setLayout(stacked_layout)
         self.prev_grid_page_btn.hide(); self.grid_page_label.hide(); self.next_grid_page_btn.hide()
 
+    def get_grid_tiles(self):
+        """The grid view's page tiles, created and placed in the layout on first use."""
+        if not self.grid_tiles:
+            for i in range(self.ITEMS_PER_GRID_PAGE):
+                page_widget = PDFPageWidget(i + 1); page_widget.hide()
+                page_widget.page_selected.connect(self.on_page_widget_clicked); page_widget.page_checkbox_clicked.connect(self.on_page_selected)
+                # --- MODIFICATION: Add widgets to rows 1 and 2 to account for top stretch ---
+                self.preview_layout.addWidget(page_widget, (i // 3) + 1, (i % 3) + 1)
+                self.grid_tiles.append(page_widget)
+        return self.grid_tiles
+
     def show_pdf_preview(self):
-        self.preview_container.show()
         self.single_page_widget.hide()
-        self.prev_grid_page_btn.show(); self.grid_page_label.show(); self.next_grid_page_btn.show()
         if not self.selected_pdf:
+            self.preview_container.show()
             self.prev_grid_page_btn.hide(); self.grid_page_label.hide(); self.next_grid_page_btn.hide()
             return
-        self.clear_preview()
+        self.clear_preview(keep_tiles=True)
         total_doc_pages = self.selected_pdf['pages']
         self.page_info.setText(""); self.update_selected_count()
         self.select_all_btn.setVisible(True); self.deselect_all_btn.setVisible(True); self.continue_btn.setVisible(True)
+        if self.CONTINUOUS_SCROLL_GRID:
+            self.preview_container.hide(); self.page_scroll_grid.show()
+            self.prev_grid_page_btn.hide(); self.grid_page_label.hide(); self.next_grid_page_btn.hide()
+            # Thumbnails are requested from on_visible_pages_changed
+            first_page = (self.current_grid_page - 1) * self.ITEMS_PER_GRID_PAGE + 1
+            self.page_scroll_grid.set_pages(total_doc_pages, lambda page_num: page_num in self.selected_pages, first_page)
+            return
+        self.preview_container.show()
+        self.prev_grid_page_btn.show(); self.grid_page_label.show(); self.next_grid_page_btn.show()
         total_grid_pages = (total_doc_pages + self.ITEMS_PER_GRID_PAGE - 1) // self.ITEMS_PER_GRID_PAGE
         self.grid_page_label.setText(f"{self.current_grid_page} / {total_grid_pages}")
         self.prev_grid_page_btn.setEnabled(self.current_grid_page > 1); self.next_grid_page_btn.setEnabled(self.current_grid_page < total_grid_pages)
-        start_page = (self.current_grid_page - 1) * self.ITEMS_PER_GRID_PAGE + 1
-        end_page = min(self.current_grid_page * self.ITEMS_PER_GRID_PAGE, total_doc_pages)
-        pages_to_show = list(range(start_page, end_page + 1))
+        pages_to_show = self.get_grid_page_numbers(self.current_grid_page)
         
-        for i, page_num in enumerate(pages_to_show):
-            page_widget = PDFPageWidget(page_num, checked=self.selected_pages.get(page_num, True))
-            page_widget.page_selected.connect(self.on_page_widget_clicked); page_widget.page_checkbox_clicked.connect(self.on_page_selected)
+        for i, page_widget in enumerate(self.get_grid_tiles()):
+            if i >= len(pages_to_show):
+                if page_widget.isVisible(): page_widget.hide()
+                continue
+            page_num = pages_to_show[i]
+            page_widget.bind(page_num, page_num in self.selected_pages)
+            if not page_widget.isVisible(): page_widget.show()
             self.page_widgets.append(page_widget); self.page_widget_map[page_num] = page_widget
-            # --- MODIFICATION: Add widgets to rows 1 and 2 to account for top stretch ---
-            self.preview_layout.addWidget(page_widget, (i // 3) + 1, (i % 3) + 1)
-            
-        if PYMUPDF_AVAILABLE:
-            self.preview_thread = PDFPreviewThread(self.selected_pdf['path'], pages_to_show)
-            self.preview_thread.preview_ready.connect(self.on_preview_ready); self.preview_thread.error_occurred.connect(self.on_preview_error)
-            self.preview_thread.start()
-        else:
+        self.request_thumbnails(pages_to_show)
+
+    def on_visible_pages_changed(self, pages):
+        """The continuous grid scrolled to other pages: bind their tiles and thumbnails."""
+        if not self.selected_pdf or not pages: return
+        self.page_widgets = self.page_scroll_grid.visible_tiles()
+        self.page_widget_map = {widget.page_num: widget for widget in self.page_widgets}
+        # Keeps the prefetch and the paged view in step with the scroll position
+        self.current_grid_page = (pages[0] - 1) // self.ITEMS_PER_GRID_PAGE + 1
+        self.request_thumbnails(pages)
+
+    def request_thumbnails(self, pages_to_show):
+        """Shows the thumbnails of pages_to_show from memory and starts a thread for the rest."""
+        if not PYMUPDF_AVAILABLE:
             for widget in self.page_widgets: widget.preview_label.setText(f"Page {widget.page_num}\n\nPDF Preview\nRequires PyMuPDF")
-
-    def clear_preview(self):
-        if self.preview_thread and self.preview_thread.isRunning(): self.preview_thread.stop(); self.preview_thread.wait()
-        
-        while self.preview_layout.count():
-            item = self.preview_layout.takeAt(0)
-            if item is not None:
-                widget = item.widget()
-                if widget is not None:
-                    widget.deleteLater()
-            
-        self.page_widgets.clear(); self.page_widget_map.clear()
+            return
+        # The visible thumbnails go first; the prefetch restarts around them when they are done
+        self.cancel_preview_thread(); self.cancel_prefetch()
+        # Thumbnails still in memory are shown right away; the thread handles the rest
+        doc_hash = known_content_hash(self.selected_pdf['path'])
+        pages_to_render = []
+        for page_num in pages_to_show:
+            image = self.thumbnail_cache.get_from_memory(doc_hash, page_num, PDFPreviewThread.THUMBNAIL_SIZE) if doc_hash else None
+            if image is not None: self.page_widget_map[page_num].set_preview_image(QPixmap.fromImage(image))
+            else: pages_to_render.append(page_num)
+        if pages_to_render:
+            thread = self.preview_thread = PDFPreviewThread(self.selected_pdf['path'], pages_to_render, self.thumbnail_cache)
+            thread.preview_ready.connect(self.on_preview_ready); thread.error_occurred.connect(self.on_preview_error)
+            # Prefetching waits until the visible thumbnails are done
+            thread.finished.connect(lambda: thread is self.preview_thread and self.start_prefetch())
+            thread.start()
+        else: self.start_prefetch()
+
+    def cancel_preview_thread(self):
+        thread = self.preview_thread
+        # Thumbnails the old thread already queued are dropped in on_preview_ready
+        self.preview_thread = None
+        if thread and thread.isRunning():
+            # Not waited on, so scrolling never blocks on a render
+            thread.stop(); self.stopping_threads.append(thread)
+            thread.finished.connect(lambda: self.stopping_threads.remove(thread))
+
+    def get_grid_page_numbers(self, grid_page):
+        total_doc_pages = self.selected_pdf['pages'] if self.selected_pdf else 0
+        start_page = (grid_page - 1) * self.ITEMS_PER_GRID_PAGE + 1
+        end_page = min(grid_page * self.ITEMS_PER_GRID_PAGE, total_doc_pages)
+        return list(range(start_page, end_page + 1)) if grid_page >= 1 else []
+
+    def start_prefetch(self):
+        """Prefetch around what is on screen: neighbouring grid pages, or the neighbouring single pages."""
+        self.cancel_prefetch()
+        if not PYMUPDF_AVAILABLE or not self.selected_pdf: return
+        if self.view_mode == 'all':
+            # Nearest grid pages first, so a large document never queues all its pages
+            thumbnail_pages = []
+            for distance in range(1, self.PREFETCH_GRID_PAGES + 1):
+                thumbnail_pages += self.get_grid_page_numbers(self.current_grid_page + distance) + self.get_grid_page_numbers(self.current_grid_page - distance)
+            # Any visible page may be tapped to open it in the single-page view
+            view_pages = [widget.page_num for widget in self.page_widgets]
+        else:
+            thumbnail_pages = []
+            view_pages = [page_num for page_num in (self.single_page_index + 1, self.single_page_index - 1) if 1 <= page_num <= self.selected_pdf['pages']]
+        self.prefetch_thread = PreviewPrefetchThread(self.selected_pdf['path'], thumbnail_pages, view_pages, self.get_single_page_view_size(), self.thumbnail_cache)
+        self.prefetch_thread.start(QThread.IdlePriority)
+
+    def cancel_prefetch(self):
+        thread = self.prefetch_thread
+        self.prefetch_thread = None
+        if thread and thread.isRunning():
+            # Not waited on; it stops after the page it is rendering
+            thread.stop(); self.stopping_threads.append(thread)
+            thread.finished.connect(lambda: self.stopping_threads.remove(thread))
+    def stop_render_threads(self):
+        """Called when the application closes: stops the threads rendering in the worker pool and waits for them."""
+        self.cancel_preview_thread(); self.cancel_prefetch()
+        # Their shared memory slots are released once the pages in flight are done; bounded
+        # so a page stuck in a dead worker cannot hang the exit
+        for thread in list(self.stopping_threads):
+            if not thread.wait(self.SHUTDOWN_WAIT_MS): print("Warning: Preview thread did not stop in time")
+
+    def get_single_page_view_size(self): return (self.SINGLE_PAGE_PREVIEW_WIDTH, self.SINGLE_PAGE_PREVIEW_HEIGHT)
+
+    def clear_preview(self, keep_tiles=False):
+        self.cancel_preview_thread()
+        # Tiles stay in the layout for the next grid page; hiding them all would relayout twice
+        if not keep_tiles:
+            for widget in self.grid_tiles: widget.hide()
+            self.page_scroll_grid.hide(); self.page_scroll_grid.set_pages(0, lambda page_num: True)
+        self.page_widgets = []; self.page_widget_map = {}
         self.select_all_btn.setVisible(False); self.deselect_all_btn.setVisible(False); self.continue_btn.setVisible(False)
         self.selected_count_label.setText("")
         
     # ... (rest of the methods are unchanged) ...
 
     def show_single_page(self):
-        self.preview_container.hide()
+        self.preview_container.hide(); self.page_scroll_grid.hide()
         self.single_page_widget.show()
         self.prev_grid_page_btn.hide(); self.grid_page_label.hide(); self.next_grid_page_btn.hide()
         if not self.selected_pdf: return
@@ -436,19 +832,39 @@ class FileBrowserScreen(QWidget):
         total_pages = self.selected_pdf['pages']
         if not (1 <= self.single_page_index <= total_pages): self.single_page_index = 1
         page_num = self.single_page_index; self.page_info.setText(f"Page {page_num} of {total_pages}"); self.page_input.setText(f"{page_num}")
-        self.single_page_checkbox.blockSignals(True); self.single_page_checkbox.setChecked(self.selected_pages.get(page_num, False)); self.single_page_checkbox.blockSignals(False)
+        self.single_page_checkbox.blockSignals(True); self.single_page_checkbox.setChecked(page_num in self.selected_pages); self.single_page_checkbox.blockSignals(False)
         self.update_zoom_label(); self.single_page_preview.clear()
+        # Results still on their way for the previous page are dropped by generation
+        self.single_page_generation += 1; self.cancel_single_page_render()
         if PYMUPDF_AVAILABLE:
-            try:
-                doc = fitz.open(self.selected_pdf['path'])
-                if page_num <= len(doc):
-                    page = doc[page_num-1]
-                    pix = page.get_pixmap(matrix=fitz.Matrix(300/72, 300/72), alpha=False)
-                    qimg = QImage(pix.samples, pix.width, pix.height, pix.stride, QImage.Format_RGB888)
-                    self.single_page_preview.setPixmap(QPixmap.fromImage(qimg))
-                doc.close()
-            except Exception as e: print(f"Error rendering page {page_num}: {e}"); self.single_page_preview.clear()
-        else: self.single_page_preview.clear()
+            view_size = self.get_single_page_view_size()
+            doc_hash = known_content_hash(self.selected_pdf['path'])
+            image = self.thumbnail_cache.get_from_memory(doc_hash, page_num, view_size) if doc_hash else None
+            if image is not None: self.single_page_preview.setPixmap(QPixmap.fromImage(image))
+            else:
+                # Show the cached thumbnail right away, scaled up, until the screen-size render arrives
+                thumbnail = self.thumbnail_cache.get_from_memory(doc_hash, page_num, PDFPreviewThread.THUMBNAIL_SIZE) if doc_hash else None
+                if thumbnail is not None: self.single_page_preview.setPixmap(QPixmap.fromImage(thumbnail))
+                self.start_single_page_render([(view_size, True)])
+            self.single_page_preview.setTileSource(self.selected_pdf['path'], page_num)
+            self.start_prefetch()
+
+    def start_single_page_render(self, sizes):
+        thread = SinglePageRenderThread(self.selected_pdf['path'], self.single_page_index, sizes, self.single_page_generation, self.thumbnail_cache)
+        thread.image_ready.connect(self.on_single_page_image_ready)
+        self.single_page_threads.append(thread); thread.finished.connect(lambda: self.single_page_threads.remove(thread))
+        thread.start()
+
+    def cancel_single_page_render(self):
+        # Not waited on: a stopped thread finishes the render in progress and emits nothing more
+        for thread in self.single_page_threads: thread.stop()
+
+    def on_single_page_image_ready(self, generation, page_num, image):
+        if generation != self.single_page_generation or self.view_mode != 'single': return
+        current = self.single_page_preview.pixmap()
+        if current is None: self.single_page_preview.setPixmap(QPixmap.fromImage(image))
+        # Renders may finish out of order; never trade a sharper image for a blurrier one
+        elif image.width() > current.width(): self.single_page_preview.replacePixmap(QPixmap.fromImage(image))
 
     def _set_view_mode_buttons_style(self): pass
     def update_view_mode_buttons(self): self.view_all_btn.setChecked(self.view_mode == 'all'); self.view_single_btn.setChecked(self.view_mode == 'single')
@@ -469,89 +885,124 @@ class FileBrowserScreen(QWidget):
     def next_single_page(self):
         if self.selected_pdf and self.single_page_index < self.selected_pdf['pages']: self.single_page_index += 1; self.show_single_page()
     def single_page_checkbox_changed(self, state):
-        if self.selected_pdf: self.selected_pages[self.single_page_index] = (state == Qt.Checked); self.pdf_page_selections[self.selected_pdf['path']] = self.selected_pages.copy(); self.update_selected_count()
+        if self.selected_pdf: self.selected_pages.set(self.single_page_index, state == Qt.Checked); self.pdf_page_selections[self.selected_pdf['path']] = self.selected_pages.copy(); self.update_selected_count(); self.update_speculative_analysis()
     def on_page_widget_clicked(self, page_num): self.single_page_index = page_num; self.set_single_page_view()
     def on_page_selected(self, page_num, selected):
-        self.selected_pages[page_num] = selected
+        self.selected_pages.set(page_num, selected)
+        # Snapshots are O(1): the selection's bits are an immutable int
         if self.selected_pdf: self.pdf_page_selections[self.selected_pdf['path']] = self.selected_pages.copy()
-        self.update_selected_count()
+        self.update_selected_count(); self.update_speculative_analysis()
         if self.view_mode == 'single' and page_num == self.single_page_index:
             self.single_page_checkbox.blockSignals(True); self.single_page_checkbox.setChecked(selected); self.single_page_checkbox.blockSignals(False)
     def load_pdf_files(self, pdf_files):
         self.pdf_files_data = []
         self.pdf_page_selections = {}
+        options_screen = getattr(self.main_app, 'printing_options_screen', None)
+        if options_screen is not None: options_screen.reset_analysis_session()
+        # Documents of the previous customer are closed; the new files were just parsed for their page counts
+        get_document_session().retain([pdf_info['path'] for pdf_info in pdf_files])
         for pdf_info in pdf_files: self.pdf_files_data.append({'filename': pdf_info['filename'], 'type': 'pdf', 'pages': pdf_info.get('pages', 1), 'size': pdf_info['size'], 'path': pdf_info['path']})
-        self.file_header.setText(f"PDF Files ({len(self.pdf_files_data)} files)")
-        self.clear_file_list()
-        self.pdf_buttons = []
-        for pdf_data in self.pdf_files_data:
-            pdf_btn = PDFButton(pdf_data)
-            pdf_btn.pdf_selected.connect(self.select_pdf)
-            self.pdf_buttons.append(pdf_btn)
-            self.file_list_layout.insertWidget(self.file_list_layout.count() - 1, pdf_btn)
+        # A new customer starts with an unfiltered list sorted by name
+        self.file_search_input.blockSignals(True); self.file_search_input.clear(); self.file_search_input.blockSignals(False)
+        self.file_list_model.set_files(self.pdf_files_data); self.file_list_view.scrollToTop()
+        self.update_file_header(); self.update_sort_buttons()
         self.selected_pdf = None; self.selected_pages = None
         self.clear_preview()
         self.page_info.setText("Select a PDF to preview pages")
         self.preview_header.setText("Select a PDF file to preview pages")
         self.prev_grid_page_btn.hide(); self.grid_page_label.hide(); self.next_grid_page_btn.hide()
-        if self.pdf_files_data: self.select_pdf(self.pdf_files_data[0])
-    def clear_file_list(self):
-        while self.file_list_layout.count() > 1:
-            child = self.file_list_layout.takeAt(0)
-            if child.widget(): child.widget().deleteLater()
-    
+        if self.pdf_files_data: self.select_pdf(self.file_list_model.file_index[0])
+    def update_file_header(self):
+        shown = len(self.file_list_model.file_index); total = len(self.pdf_files_data)
+        self.file_header.setText(f"PDF Files ({total} files)" if shown == total else f"PDF Files ({shown} of {total} files)")
+    def update_sort_buttons(self):
+        file_index = self.file_list_model.file_index
+        for sort_key, sort_btn in self.file_sort_buttons.items():
+            label = sort_key.capitalize()
+            if sort_key == file_index.sort_key: label += " ↓" if file_index.descending else " ↑"
+            sort_btn.setText(label); sort_btn.setChecked(sort_key == file_index.sort_key)
+    def filter_files(self, text):
+        self.file_list_model.set_filter(text); self.update_file_header()
+    def sort_files(self, sort_key):
+        # Tapping the current sort again reverses it
+        file_index = self.file_list_model.file_index
+        descending = not file_index.descending if sort_key == file_index.sort_key else False
+        self.file_list_model.set_sort(sort_key, descending); self.update_sort_buttons(); self.scroll_to_selected_file()
+    def scroll_to_selected_file(self):
+        row = self.file_list_model.file_index.row_of(self.selected_pdf['path']) if self.selected_pdf else None
+        if row is None: self.file_list_view.scrollToTop(); return
+        self.file_list_model.ensure_loaded(row); self.file_list_view.scrollTo(self.file_list_model.index(row))
+    def on_file_clicked(self, index):
+        pdf_data = index.data(PDFFileListModel.FILE_ROLE)
+        if pdf_data is not None: self.select_pdf(pdf_data)
     def select_pdf(self, pdf_data):
         if self.selected_pdf is not None and self.selected_pages is not None: self.pdf_page_selections[self.selected_pdf['path']] = self.selected_pages.copy()
         self.selected_pdf = pdf_data
         if pdf_data['path'] in self.pdf_page_selections: self.selected_pages = self.pdf_page_selections[self.selected_pdf['path']].copy()
-        else: self.selected_pages = {i: True for i in range(1, pdf_data['pages'] + 1)}
-        for btn in self.pdf_buttons: btn.set_selected(btn.pdf_data == pdf_data)
+        else: self.selected_pages = PageSelection.all(pdf_data['pages'])
+        self.file_list_model.set_selected_path(pdf_data['path'])
         self.preview_header.setText(f"{pdf_data['filename']}")
         self.view_mode = 'all'; self.update_view_mode_buttons()
         self.current_grid_page = 1; self.single_page_index = 1
         self.show_pdf_preview()
+        self.update_speculative_analysis(restart=True)
+    def get_selected_page_list(self): return self.selected_pages.copy()
+    def update_speculative_analysis(self, restart=False):
+        # Start the color analysis in the background so Print Options finds it already done
+        options_screen = getattr(self.main_app, 'printing_options_screen', None)
+        if options_screen is None or not self.selected_pdf: return
+        if restart: options_screen.start_speculative_analysis(self.selected_pdf['path'], self.get_selected_page_list())
+        else: options_screen.update_speculative_analysis(self.selected_pdf['path'], self.get_selected_page_list())
     def update_selected_count(self):
-        if not self.selected_pages: return
-        selected_count = sum(1 for selected in self.selected_pages.values() if selected)
-        self.selected_count_label.setText(f"Selected: {selected_count}/{len(self.selected_pages)} pages")
+        if self.selected_pages is None: return
+        selected_count = self.selected_pages.count
+        self.selected_count_label.setText(f"Selected: {selected_count}/{self.selected_pages.page_count} pages")
         self.continue_btn.setEnabled(selected_count > 0)
     def select_all_pages(self):
-        if not self.selected_pages: return
-        for page_num in self.selected_pages: self.selected_pages[page_num] = True
+        if self.selected_pages is None: return
+        self.selected_pages.select_all()
         if self.selected_pdf: self.pdf_page_selections[self.selected_pdf['path']] = self.selected_pages.copy()
         for widget in self.page_widgets: widget.checkbox.setChecked(True)
-        self.update_selected_count()
+        self.page_scroll_grid.refresh_checkboxes()
+        self.update_selected_count(); self.update_speculative_analysis()
         if self.view_mode == 'single': self.single_page_checkbox.blockSignals(True); self.single_page_checkbox.setChecked(True); self.single_page_checkbox.blockSignals(False)
     def deselect_all_pages(self):
-        if not self.selected_pages: return
-        for page_num in self.selected_pages: self.selected_pages[page_num] = False
+        if self.selected_pages is None: return
+        self.selected_pages.clear()
         if self.selected_pdf: self.pdf_page_selections[self.selected_pdf['path']] = self.selected_pages.copy()
         for widget in self.page_widgets: widget.checkbox.setChecked(False)
-        self.update_selected_count()
+        self.page_scroll_grid.refresh_checkboxes()
+        self.update_selected_count(); self.update_speculative_analysis()
         if self.view_mode == 'single': self.single_page_checkbox.blockSignals(True); self.single_page_checkbox.setChecked(False); self.single_page_checkbox.blockSignals(False)
     def continue_to_print_options(self):
         if not self.selected_pdf: QMessageBox.warning(self, "No PDF Selected", "Please select a PDF file."); return
-        selected_pages_list = [page for page, selected in self.selected_pages.items() if selected]
+        selected_pages_list = self.get_selected_page_list()
         if not selected_pages_list: QMessageBox.warning(self, "No Pages Selected", "Please select at least one page to print."); return
         options_screen = self.main_app.printing_options_screen
         options_screen.set_pdf_data(self.selected_pdf, selected_pages_list)
         self.main_app.show_screen('printing_options')
-    def on_preview_ready(self, page_num, pixmap):
+    def on_preview_ready(self, page_num, image):
+        if self.sender() is not self.preview_thread: return
+        pixmap = QPixmap.fromImage(image)
         if self.view_mode == 'all':
             widget = self.page_widget_map.get(page_num)
             if widget: widget.set_preview_image(pixmap)
         elif self.view_mode == 'single' and page_num == self.single_page_index: self.single_page_preview.setPixmap(pixmap)
     def on_preview_error(self, page_num, error_msg):
+        if self.sender() is not self.preview_thread: return
         if self.view_mode == 'all':
             widget = self.page_widget_map.get(page_num)
             if widget: widget.set_error_message(error_msg)
         elif self.view_mode == 'single' and page_num == self.single_page_index: self.single_page_preview.clear()
-    def go_back(self): self.main_app.show_screen('usb')
+    def go_back(self):
+        options_screen = getattr(self.main_app, 'printing_options_screen', None)
+        if options_screen is not None: options_screen.cancel_speculative_analysis()
+        self.main_app.show_screen('usb')
     def on_enter(self):
         if self.restore_payment_data: self.restore_payment_data = None
         elif self.pdf_files_data and not self.selected_pdf: self.select_pdf(self.pdf_files_data[0])
     def on_leave(self):
-        if self.preview_thread and self.preview_thread.isRunning(): self.preview_thread.stop(); self.preview_thread.wait()
+        self.cancel_preview_thread(); self.cancel_prefetch(); self.cancel_single_page_render(); self.single_page_preview.clearTileSource()
     def zoom_in(self):
         if self.single_page_preview: self.single_page_preview.zoomIn(); self.update_zoom_label()
     def zoom_out(self):
@@ -0,0 +1,139 @@
+# page_selection.py
+
+import re
+
+# "1-20, 35, 40-50": single pages or inclusive ranges, separated by commas or spaces
+RANGE_PATTERN = re.compile(r'^(\d+)(?:-(\d+))?$')
+
+def _bit_count(value):
+    return value.bit_count() if hasattr(value, 'bit_count') else bin(value).count('1')
+
+class PageSelection:
+    """
+    The selected 1-based pages of one document, stored as the bits of a Python int
+    (bit n - 1 for page n) with the number of selected pages kept up to date.
+    Python ints are immutable, so copy() is O(1) and copies never see each other's
+    changes: a copy is a copy-on-write snapshot. Iterating yields the selected pages in
+    order; the list is built once per state and shared by copies of that state, so
+    Print Options and the printer use it without rebuilding it.
+    """
+
+    def __init__(self, page_count, bits=0, count=None):
+        self.page_count = page_count
+        self._bits = bits & self._mask(1, page_count)
+        self.count = _bit_count(self._bits) if count is None else count
+        self._pages = None
+
+    @classmethod
+    def all(cls, page_count):
+        return cls(page_count, cls._mask(1, page_count), page_count)
+
+    @classmethod
+    def from_pages(cls, pages, page_count=None):
+        pages = list(pages)
+        selection = cls(page_count if page_count is not None else max(pages, default=0))
+        for page_num in pages: selection.set(page_num, True)
+        return selection
+
+    @classmethod
+    def from_ranges(cls, text, page_count):
+        selection = cls(page_count)
+        selection.select_ranges(text)
+        return selection
+
+    @staticmethod
+    def _mask(first, last):
+        """Bits for pages first..last inclusive."""
+        if last < first: return 0
+        return ((1 << (last - first + 1)) - 1) << (first - 1)
+
+    def _changed(self, bits):
+        self._bits = bits
+        self._pages = None
+
+    def __contains__(self, page_num):
+        return 1 <= page_num <= self.page_count and bool(self._bits >> (page_num - 1) & 1)
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        return iter(self.pages())
+
+    def __eq__(self, other):
+        if isinstance(other, PageSelection):
+            return self.page_count == other.page_count and self._bits == other._bits
+        return NotImplemented
+
+    def __repr__(self):
+        return f"PageSelection({self.to_ranges_text() or 'none'} of {self.page_count})"
+
+    def copy(self):
+        """O(1) snapshot; later changes to either selection do not affect the other."""
+        snapshot = PageSelection.__new__(PageSelection)
+        snapshot.page_count = self.page_count
+        snapshot._bits = self._bits
+        snapshot.count = self.count
+        snapshot._pages = self._pages
+        return snapshot
+
+    def pages(self):
+        """The selected pages in ascending order, as a tuple built once per state."""
+        if self._pages is None:
+            # The binary string, least significant bit first, has a '1' for every selected page
+            self._pages = tuple(index + 1 for index, bit in enumerate(bin(self._bits)[:1:-1]) if bit == '1')
+        return self._pages
+
+    def set(self, page_num, selected):
+        """Selects or deselects one page."""
+        if not 1 <= page_num <= self.page_count: raise ValueError(f"Page {page_num} is out of range")
+        if (page_num in self) == selected: return
+        self._changed(self._bits ^ (1 << (page_num - 1)))
+        self.count += 1 if selected else -1
+
+    def set_range(self, first, last, selected):
+        """Selects or deselects pages first..last inclusive."""
+        if not 1 <= first <= last <= self.page_count: raise ValueError(f"Pages {first}-{last} are out of range")
+        mask = self._mask(first, last)
+        if selected:
+            added = mask & ~self._bits
+            if added: self._changed(self._bits | added); self.count += _bit_count(added)
+        else:
+            removed = mask & self._bits
+            if removed: self._changed(self._bits & ~removed); self.count -= _bit_count(removed)
+
+    def select_all(self):
+        if self.page_count: self.set_range(1, self.page_count, True)
+
+    def clear(self):
+        if self.page_count: self.set_range(1, self.page_count, False)
+
+    @staticmethod
+    def parse_ranges(text, page_count):
+        """Parses "1-20, 35, 40-50" into [(1, 20), (35, 35), (40, 50)]; raises ValueError."""
+        ranges = []
+        # Spaces around a hyphen belong to the range, any other space separates
+        for part in re.split(r'[,\s]+', re.sub(r'\s*-\s*', '-', text.strip())):
+            if not part: continue
+            match = RANGE_PATTERN.match(part)
+            if not match: raise ValueError(f"Not a page or page range: '{part}'")
+            first = int(match.group(1)); last = int(match.group(2) or first)
+            if first > last: first, last = last, first
+            if not 1 <= first <= last <= page_count: raise ValueError(f"Pages {part} are outside 1-{page_count}")
+            ranges.append((first, last))
+        return ranges
+
+    def select_ranges(self, text):
+        """Adds the pages of a range string such as "1-20, 35, 40-50" to the selection."""
+        for first, last in self.parse_ranges(text, self.page_count): self.set_range(first, last, True)
+
+    def ranges(self):
+        """The selection as inclusive (first, last) runs of consecutive pages."""
+        runs = []
+        for page_num in self.pages():
+            if runs and runs[-1][1] == page_num - 1: runs[-1][1] = page_num
+            else: runs.append([page_num, page_num])
+        return [tuple(run) for run in runs]
+
+    def to_ranges_text(self):
+        return ", ".join(str(first) if first == last else f"{first}-{last}" for first, last in self.ranges())
@@ -397,6 +397,16 @@ class PaymentScreen(QWidget):
             return
 
         change_amount = self.amount_received - self.total_cost
+        # Ink used by the whole job in full-page equivalents, when the pages were analyzed.
+        # Vector pages are priced without a render, so only some pages may have been measured
+        analysis = self.payment_data.get('analysis') or {}
+        coverage = analysis.get('coverage')
+        ink_coverage = color_coverage = ink_measured_pages = ink_total_pages = None
+        if coverage and coverage.get('measured_pages'):
+            ink_coverage = coverage['ink_coverage'] * self.payment_data['copies']
+            color_coverage = coverage['color_coverage'] * self.payment_data['copies']
+            ink_measured_pages = coverage['measured_pages']
+            ink_total_pages = len(analysis.get('page_analysis', {}))
         transaction_data = {
             'file_name': os.path.basename(self.payment_data['pdf_data']['path']),
             'pages': len(self.payment_data['selected_pages']),
@@ -405,7 +415,11 @@ class PaymentScreen(QWidget):
             'total_cost': self.total_cost,
             'amount_paid': self.amount_received,
             'change_given': change_amount,
-            'status': 'completed'
+            'status': 'completed',
+            'ink_coverage': ink_coverage,
+            'color_coverage': color_coverage,
+            'ink_measured_pages': ink_measured_pages,
+            'ink_total_pages': ink_total_pages
         }
         self.db_manager.log_transaction(transaction_data)
 
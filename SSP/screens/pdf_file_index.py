@@ -0,0 +1,71 @@
+# pdf_file_index.py
+
+import re
+
+# Runs of digits compare as numbers, so "Lesson 2" sorts before "Lesson 10"
+DIGITS_PATTERN = re.compile(r'(\d+)')
+
+def natural_key(name):
+    return tuple(int(part) if part.isdigit() else part for part in DIGITS_PATTERN.split(name.casefold()))
+
+class PDFFileIndex:
+    """
+    In-memory index of the PDF files found on a drive, answering "which files, in which
+    order" for the file list. Each sort order is computed once per set of files and
+    reused; the filter keeps the files whose name contains every word of the search
+    text, and narrowing the search (typing more) only re-checks the files still shown.
+    `rows` is the current result: positions in `files`, in display order.
+    """
+    SORT_KEYS = {
+        'name': lambda f: natural_key(f['filename']),
+        'size': lambda f: (f.get('size', 0), natural_key(f['filename'])),
+        'pages': lambda f: (f.get('pages', 1), natural_key(f['filename'])),
+    }
+
+    def __init__(self, files=()):
+        self.files = list(files)
+        self.names = [f['filename'].casefold() for f in self.files]
+        self.orders = {}
+        self.sort_key = 'name'; self.descending = False
+        self.terms = []
+        self.rows = self.order()
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, row):
+        return self.files[self.rows[row]]
+
+    def order(self):
+        """Positions of all files in the current sort order."""
+        if self.sort_key not in self.orders:
+            key = self.SORT_KEYS[self.sort_key]
+            self.orders[self.sort_key] = sorted(range(len(self.files)), key=lambda i: key(self.files[i]))
+        order = self.orders[self.sort_key]
+        return order[::-1] if self.descending else list(order)
+
+    def matches(self, position, terms=None):
+        name = self.names[position]
+        return all(term in name for term in (self.terms if terms is None else terms))
+
+    def set_sort(self, sort_key, descending=False):
+        if sort_key not in self.SORT_KEYS: raise ValueError(f"Unknown sort key: {sort_key}")
+        if (sort_key, descending) == (self.sort_key, self.descending): return
+        self.sort_key = sort_key; self.descending = descending
+        self.rows = [i for i in self.order() if self.matches(i)]
+
+    def set_filter(self, text):
+        """Shows the files whose name contains every word of text, ignoring case."""
+        terms = text.casefold().split()
+        if terms == self.terms: return
+        # Every file matching the new terms matches the old ones when each old term is part of a new one
+        narrowing = all(any(old in new for new in terms) for old in self.terms)
+        candidates = self.rows if narrowing else self.order()
+        self.terms = terms
+        self.rows = [i for i in candidates if self.matches(i, terms)]
+
+    def row_of(self, path):
+        """The display row of the file at path, or None if it is filtered out."""
+        for row, position in enumerate(self.rows):
+            if self.files[position]['path'] == path: return row
+        return None
@@ -1,12 +1,103 @@
+import math
+import threading
+from collections import OrderedDict
+
 from PyQt5.QtWidgets import QWidget
-from PyQt5.QtCore import Qt, QSize, QPoint, QPointF
-from PyQt5.QtGui import QPainter, QPixmap, QColor, QTransform
+from PyQt5.QtCore import Qt, QSize, QPoint, QPointF, QRectF, QThread, pyqtSignal
+from PyQt5.QtGui import QPainter, QPixmap, QColor, QTransform, QImage
+
+try:
+    import fitz  # PyMuPDF
+    PYMUPDF_AVAILABLE = True
+except ImportError:
+    PYMUPDF_AVAILABLE = False
+
+from screens.document_session import get_document_session
+from screens.worker_pool import render_lock
+
+class TileRenderThread(QThread):
+    """
+    Renders square tiles of one page through MuPDF clip rectangles, borrowing the
+    session's document for each tile. Only the most
+    recently requested set of tiles is kept pending, so tiles that were panned out of
+    view before their turn are never rendered.
+    """
+    # generation, level, column, row, image
+    tile_ready = pyqtSignal(int, int, int, int, QImage)
+
+    def __init__(self, pdf_path, page_num, generation):
+        super().__init__()
+        self.pdf_path = pdf_path
+        self.page_num = page_num
+        self.generation = generation
+        self._pending = []
+        self._condition = threading.Condition()
+        self._is_running = True
+
+    def request(self, tiles):
+        """tiles: [(level, column, row, level_width, level_height), ...] in drawing order."""
+        with self._condition:
+            self._pending = list(tiles)
+            self._condition.notify()
+
+    def run(self):
+        try:
+            session = get_document_session()
+            while True:
+                with self._condition:
+                    while self._is_running and not self._pending:
+                        self._condition.wait()
+                    if not self._is_running: return
+                    level, column, row, level_width, level_height = self._pending.pop(0)
+
+                with session.document(self.pdf_path) as doc:
+                    page = doc[self.page_num - 1]
+                    page_rect = page.rect
+                    # Tile edges in page space, from the tile's position in the level image
+                    tile = PDFPreviewWidget.TILE_SIZE
+                    zoom_x = level_width / page_rect.width
+                    zoom_y = level_height / page_rect.height
+                    clip = fitz.Rect(page_rect.x0 + column * tile / zoom_x, page_rect.y0 + row * tile / zoom_y,
+                                     page_rect.x0 + min((column + 1) * tile, level_width) / zoom_x,
+                                     page_rect.y0 + min((row + 1) * tile, level_height) / zoom_y)
+                    with render_lock:
+                        pix = page.get_pixmap(matrix=fitz.Matrix(zoom_x, zoom_y), clip=clip, alpha=False, colorspace=fitz.csRGB)
+                samples = pix.samples_mv if hasattr(pix, 'samples_mv') else pix.samples
+                image = QImage(samples, pix.width, pix.height, pix.stride, QImage.Format_RGB888).copy()
+                if self._is_running:
+                    self.tile_ready.emit(self.generation, level, column, row, image)
+        except Exception as e:
+            print(f"Tile rendering stopped: {e}")
+
+    def stop(self):
+        with self._condition:
+            self._is_running = False
+            self._condition.notify()
 
 class PDFPreviewWidget(QWidget):
+    # Edge of a zoom tile in pixels of its level image
+    TILE_SIZE = 256
+    # Tiles kept across all levels, about 256 KB each
+    MAX_CACHED_TILES = 48
+    # Smallest mipmap level kept when halving the source pixmap
+    MIN_MIPMAP_SIZE = 64
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self._pixmap = None
         self._borderless = False
+
+        # Halvings of the pixmap, and the last scaled copy with the size it was scaled to
+        self._mipmaps = []
+        self._scaled_pixmap = None
+        self._scaled_size = None
+
+        # Level-of-detail tiles used when zoomed in: {(level, column, row): QPixmap}
+        self._tile_source = None
+        self._tiles = OrderedDict()
+        self._tile_thread = None
+        self._tile_generation = 0
+        self._stopping_threads = []
         
         # Zoom and pan properties
         self._zoom_factor = 1.0
@@ -29,17 +120,127 @@ class PDFPreviewWidget(QWidget):
 
     def setPixmap(self, pixmap):
         self._pixmap = pixmap
+        self._invalidate_scaled()
         # Reset zoom and pan when new pixmap is set
         self._zoom_factor = 1.0
         self._pan_offset = QPointF(0, 0)
         self.update()
 
+    def pixmap(self):
+        return self._pixmap
+
+    def replacePixmap(self, pixmap):
+        """Swap in a different resolution of the same page, keeping zoom and pan"""
+        self._pixmap = pixmap
+        self._invalidate_scaled()
+        self.update()
+
     def clear(self):
         self._pixmap = None
+        self._invalidate_scaled()
         self._zoom_factor = 1.0
         self._pan_offset = QPointF(0, 0)
+        self.clearTileSource()
         self.update()
 
+    def _invalidate_scaled(self):
+        self._mipmaps = []
+        self._scaled_pixmap = None
+        self._scaled_size = None
+
+    def _get_scaled_pixmap(self, width, height):
+        """
+        Returns the pixmap scaled to width x height. The result is kept until the drawn
+        size changes (zoom or widget size), so panning only blits it. It is scaled from
+        the smallest halving of the source that is still at least as large.
+        """
+        if self._scaled_size != (width, height):
+            if not self._mipmaps: self._mipmaps = [self._pixmap]
+            source = self._mipmaps[0]
+            for level in range(1, 32):
+                if level == len(self._mipmaps):
+                    previous = self._mipmaps[-1]
+                    if min(previous.width(), previous.height()) // 2 < self.MIN_MIPMAP_SIZE: break
+                    self._mipmaps.append(previous.scaled(previous.width() // 2, previous.height() // 2,
+                                                         Qt.IgnoreAspectRatio, Qt.SmoothTransformation))
+                candidate = self._mipmaps[level]
+                if candidate.width() < width or candidate.height() < height: break
+                source = candidate
+            self._scaled_pixmap = source.scaled(width, height, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+            self._scaled_size = (width, height)
+        return self._scaled_pixmap
+
+    def setTileSource(self, pdf_path, page_num):
+        """
+        Render zoomed views of this page as tiles, on demand. The pixmap stays the base
+        layer and is shown wherever a tile is not ready yet.
+        """
+        self.clearTileSource()
+        if PYMUPDF_AVAILABLE:
+            self._tile_source = (pdf_path, page_num)
+            self.update()
+
+    def clearTileSource(self):
+        self._tile_source = None
+        self._tiles.clear()
+        self._tile_generation += 1
+        thread = self._tile_thread
+        self._tile_thread = None
+        if thread and thread.isRunning():
+            # Not waited on; it stops after the tile in progress
+            thread.stop()
+            self._stopping_threads.append(thread)
+            thread.finished.connect(lambda: self._stopping_threads.remove(thread))
+
+    def _on_tile_ready(self, generation, level, column, row, image):
+        if generation != self._tile_generation: return
+        self._tiles[(level, column, row)] = QPixmap.fromImage(image)
+        while len(self._tiles) > self.MAX_CACHED_TILES:
+            self._tiles.popitem(last=False)
+        self.update()
+
+    def _draw_tiles(self, painter, page_rect):
+        """
+        Draws the tiles covering the visible part of page_rect (the page as painted) and
+        requests the missing ones. Tiles come from the level whose resolution is the next
+        power of two at or above the current zoom, so text stays sharp.
+        """
+        if not self._tile_source or self._zoom_factor <= 1.0: return
+        level = 2 ** math.ceil(math.log2(self._zoom_factor))
+        # The level image is the unzoomed page size times the level
+        level_width = round(page_rect.width() / self._zoom_factor * level)
+        level_height = round(page_rect.height() / self._zoom_factor * level)
+        to_widget = page_rect.width() / level_width
+        visible = page_rect.intersected(QRectF(painter.clipBoundingRect() if painter.hasClipping() else QRectF(self.rect())))
+        if visible.isEmpty(): return
+
+        tile = self.TILE_SIZE
+        first_column = int((visible.left() - page_rect.left()) / to_widget // tile)
+        last_column = int(min(level_width - 1, (visible.right() - page_rect.left()) / to_widget) // tile)
+        first_row = int((visible.top() - page_rect.top()) / to_widget // tile)
+        last_row = int(min(level_height - 1, (visible.bottom() - page_rect.top()) / to_widget) // tile)
+
+        missing = []
+        for row in range(first_row, last_row + 1):
+            for column in range(first_column, last_column + 1):
+                key = (level, column, row)
+                pixmap = self._tiles.get(key)
+                if pixmap is None:
+                    missing.append((level, column, row, level_width, level_height))
+                    continue
+                self._tiles.move_to_end(key)
+                target = QRectF(page_rect.left() + column * tile * to_widget, page_rect.top() + row * tile * to_widget,
+                                pixmap.width() * to_widget, pixmap.height() * to_widget)
+                painter.drawPixmap(target, pixmap, QRectF(pixmap.rect()))
+
+        if missing:
+            if self._tile_thread is None:
+                pdf_path, page_num = self._tile_source
+                self._tile_thread = TileRenderThread(pdf_path, page_num, self._tile_generation)
+                self._tile_thread.tile_ready.connect(self._on_tile_ready)
+                self._tile_thread.start()
+            self._tile_thread.request(missing)
+
     def setBorderless(self, borderless=True):
         """Enable/disable borderless mode for maximum content area"""
         self._borderless = borderless
@@ -183,8 +384,9 @@ class PDFPreviewWidget(QWidget):
                 # Create clipping region to prevent drawing outside widget
                 painter.setClipRect(content_rect)
                 
-                # Draw the pixmap
-                painter.drawPixmap(int(x), int(y), new_width, new_height, self._pixmap)
+                # Draw the pixmap, pre-scaled so panning does not rescale it
+                painter.drawPixmap(int(x), int(y), self._get_scaled_pixmap(new_width, new_height))
+                self._draw_tiles(painter, QRectF(int(x), int(y), new_width, new_height))
                 
             else:
                 # Draw placeholder text when no pixmap
@@ -223,8 +425,9 @@ class PDFPreviewWidget(QWidget):
                 # Create clipping region to prevent drawing outside content area
                 painter.setClipRect(content_rect)
                 
-                # Draw the pixmap
-                painter.drawPixmap(int(x), int(y), new_width, new_height, self._pixmap)
+                # Draw the pixmap, pre-scaled so panning does not rescale it
+                painter.drawPixmap(int(x), int(y), self._get_scaled_pixmap(new_width, new_height))
+                self._draw_tiles(painter, QRectF(int(x), int(y), new_width, new_height))
                 
             else:
                 # Draw placeholder text when no pixmap
@@ -0,0 +1,107 @@
+# thumbnail_cache.py
+
+import os
+import threading
+from collections import OrderedDict
+
+from PyQt5.QtGui import QImage
+
+class ThumbnailCache:
+    """
+    Two-tier cache of rendered page thumbnails, keyed by document content hash, page
+    number and target size. Recently used QImages stay in memory up to max_bytes;
+    every thumbnail is also written to disk_dir so it survives memory eviction.
+    Used from preview threads and the GUI thread at the same time.
+    """
+
+    def __init__(self, disk_dir=None, max_bytes=24 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.memory = OrderedDict()
+        self.memory_bytes = 0
+        self.lock = threading.Lock()
+        self.disk_dir = None
+        if disk_dir:
+            try:
+                os.makedirs(disk_dir, exist_ok=True)
+                self.disk_dir = disk_dir
+            except OSError as e:
+                print(f"Thumbnail disk cache disabled: {e}")
+
+    def make_key(self, doc_hash, page_num, size):
+        width, height = size
+        return f"{doc_hash}_{page_num}_{width}x{height}"
+
+    def disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.png")
+
+    def image_bytes(self, image):
+        return image.sizeInBytes() if hasattr(image, 'sizeInBytes') else image.byteCount()
+
+    def get_from_memory(self, doc_hash, page_num, size):
+        """Returns the QImage if it is in memory, without touching the disk."""
+        key = self.make_key(doc_hash, page_num, size)
+        with self.lock:
+            image = self.memory.get(key)
+            if image is not None:
+                self.memory.move_to_end(key)
+        return image
+
+    def contains(self, doc_hash, page_num, size):
+        """True if the thumbnail is in memory or on disk, without loading it."""
+        key = self.make_key(doc_hash, page_num, size)
+        with self.lock:
+            if key in self.memory: return True
+        return bool(self.disk_dir) and os.path.exists(self.disk_path(key))
+
+    def get(self, doc_hash, page_num, size):
+        """Looks in memory, then on disk; disk hits are promoted back into memory."""
+        image = self.get_from_memory(doc_hash, page_num, size)
+        if image is None and self.disk_dir:
+            key = self.make_key(doc_hash, page_num, size)
+            path = self.disk_path(key)
+            if os.path.exists(path):
+                image = QImage(path)
+                if image.isNull():
+                    image = None
+                else:
+                    self.add_to_memory(key, image)
+        return image
+
+    def put(self, doc_hash, page_num, size, image):
+        """Stores a thumbnail in both tiers. The image must own its pixel data."""
+        key = self.make_key(doc_hash, page_num, size)
+        self.add_to_memory(key, image)
+        if self.disk_dir:
+            path = self.disk_path(key)
+            if not os.path.exists(path):
+                # Write under a temporary name so readers never see a partial file
+                temp_path = f"{path}.{threading.get_ident()}.tmp"
+                try:
+                    # The session cleanup removes the folder between customers
+                    os.makedirs(self.disk_dir, exist_ok=True)
+                    if image.save(temp_path, "PNG"):
+                        os.replace(temp_path, path)
+                    else:
+                        print(f"Could not write thumbnail to disk: saving {temp_path} failed")
+                except OSError as e:
+                    print(f"Could not write thumbnail to disk: {e}")
+                finally:
+                    if os.path.exists(temp_path):
+                        try: os.remove(temp_path)
+                        except OSError: pass
+
+    def add_to_memory(self, key, image):
+        with self.lock:
+            previous = self.memory.pop(key, None)
+            if previous is not None:
+                self.memory_bytes -= self.image_bytes(previous)
+            self.memory[key] = image
+            self.memory_bytes += self.image_bytes(image)
+            while self.memory_bytes > self.max_bytes and len(self.memory) > 1:
+                _, evicted = self.memory.popitem(last=False)
+                self.memory_bytes -= self.image_bytes(evicted)
+
+    def clear_memory(self):
+        with self.lock:
+            self.memory.clear()
+            self.memory_bytes = 0
@@ -6,6 +6,7 @@ import psutil
 import tempfile
 import platform
 from datetime import datetime
+from screens.document_session import get_document_session
 
 class USBFileManager:
     """Handles USB detection and PDF file filtering"""
@@ -203,12 +204,9 @@ class USBFileManager:
                                 file_size = os.path.getsize(dest_path)
                                 print(f"✅ Copied {filename} ({file_size/1024:.1f} KB)")
                                 
-                                # Get PDF page count
+                                # Get PDF page count; the parsed document stays in the session for the preview
                                 try:
-                                    import fitz  # PyMuPDF
-                                    doc = fitz.open(dest_path)
-                                    page_count = len(doc)
-                                    doc.close()
+                                    page_count = get_document_session().page_count(dest_path)
                                 except Exception:
                                     page_count = 1
                                     print(f"⚠️ Could not get page count for {filename}")
@@ -244,6 +242,7 @@ class USBFileManager:
         try:
             if os.path.exists(self.destination_dir):
                 print(f"Cleaning up temporary files in {self.destination_dir}")
+                get_document_session().close_all()
                 
                 # Remove all files in the directory
                 for filename in os.listdir(self.destination_dir):
@@ -0,0 +1,287 @@
+# worker_pool.py
+
+import os
+import time
+import signal
+import threading
+import multiprocessing
+from collections import deque, namedtuple
+from multiprocessing import resource_tracker, shared_memory
+
+try:
+    import fitz  # PyMuPDF
+    PYMUPDF_AVAILABLE = True
+except ImportError:
+    PYMUPDF_AVAILABLE = False
+
+# Number of parsed documents each worker keeps open between tasks.
+MAX_WORKER_DOCUMENTS = 2
+# Workers run below the GUI process priority.
+WORKER_NICENESS = 10
+# Page tasks queued ahead per worker; bounds the work wasted when an analysis is cancelled.
+TASKS_AHEAD_PER_WORKER = 2
+# The pool never completes a task whose worker died (a MuPDF crash, the OOM killer), so
+# results are awaited in short polls that check for cancellation, up to a deadline per task.
+TASK_POLL_INTERVAL = 0.2
+TASK_TIMEOUT = 60
+# How long a cancelled render may still use its shared memory slot before the slot is removed.
+CANCELLED_TASK_GRACE = 5
+
+# Returned by WorkerPool.wait_for_result when the caller stopped waiting
+STOPPED = object()
+
+# A page rendered by a worker. samples is a memoryview into shared memory, or None if error is set.
+RenderedPage = namedtuple('RenderedPage', 'page_num samples width height stride error')
+
+# The AA level is global to MuPDF. Every render in a process holds this lock, so no render
+# runs while render_page_pixmap has the level lowered and no two renders restore each other's.
+render_lock = threading.Lock()
+
+def render_page_pixmap(page, size, aa_level=None):
+    """Renders the page straight at the scale that fits `size` as an RGB fitz.Pixmap."""
+    width, height = size
+    zoom = min(width / page.rect.width, height / page.rect.height)
+    with render_lock:
+        previous_aa_level = None
+        if aa_level is not None:
+            previous_aa_level = fitz.TOOLS.show_aa_level()['graphics']; fitz.TOOLS.set_aa_level(aa_level)
+        try:
+            return page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False, colorspace=fitz.csRGB)
+        finally:
+            if previous_aa_level is not None: fitz.TOOLS.set_aa_level(previous_aa_level)
+
+# --- Worker process side ---
+# pdf_path -> ((st_size, st_mtime_ns), fitz.Document), least recently used first
+_worker_documents = {}
+_worker_analyzers = {}
+
+def _init_worker():
+    """Runs once in every worker process after it is forked."""
+    # Ctrl+C is handled by the GUI process, which terminates the pool itself.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Background analysis must never compete with the touchscreen for CPU time.
+    if hasattr(os, 'nice'):
+        os.nice(WORKER_NICENESS)
+
+def _get_worker_document(pdf_path):
+    """
+    Returns this worker's open document for pdf_path, opening it on first use. A file
+    copied over the same path (the next customer's file of the same name) has another
+    size or mtime, so the stale document is closed and the file reopened.
+    """
+    stat = os.stat(pdf_path)
+    signature = (stat.st_size, stat.st_mtime_ns)
+    cached = _worker_documents.pop(pdf_path, None)
+    if cached is not None and cached[0] != signature:
+        cached[1].close()
+        cached = None
+    if cached is None:
+        while len(_worker_documents) >= MAX_WORKER_DOCUMENTS:
+            oldest_path = next(iter(_worker_documents))
+            _worker_documents.pop(oldest_path)[1].close()
+        cached = (signature, fitz.open(pdf_path))
+    # Re-insert so the dict stays ordered from least to most recently used.
+    _worker_documents[pdf_path] = cached
+    return cached[1]
+
+def _get_worker_analyzer(settings):
+    key = tuple(sorted(settings.items()))
+    analyzer = _worker_analyzers.get(key)
+    if analyzer is None:
+        from screens.Print_Options_Screen import PDFColorAnalyzer
+        analyzer = PDFColorAnalyzer(**settings)
+        _worker_analyzers[key] = analyzer
+    return analyzer
+
+def _analyze_pages_task(pdf_path, pages, settings, dpi):
+    """Analyzes a chunk of 1-based pages and returns {page_num: page_result}."""
+    doc = _get_worker_document(pdf_path)
+    analyzer = _get_worker_analyzer(settings)
+    results = {}
+    for page_num in pages:
+        if not (1 <= page_num <= len(doc)): continue
+        results[page_num] = analyzer.analyze_page(doc[page_num - 1], dpi)
+    return results
+
+def _render_page_task(pdf_path, page_num, size, aa_level, slot_name):
+    """Renders one page into the GUI's shared memory slot and returns (width, height, stride)."""
+    doc = _get_worker_document(pdf_path)
+    if not (1 <= page_num <= len(doc)): raise ValueError(f"Page {page_num} is out of range")
+    pix = render_page_pixmap(doc[page_num - 1], size, aa_level)
+    slot = shared_memory.SharedMemory(name=slot_name)
+    try:
+        samples = pix.samples_mv if hasattr(pix, 'samples_mv') else pix.samples
+        slot.buf[:len(samples)] = samples
+    finally:
+        slot.close()
+    return pix.width, pix.height, pix.stride
+
+# --- GUI process side ---
+class WorkerPool:
+    """
+    Persistent pool of worker processes for CPU-heavy PDF work.
+    Workers are forked once and keep their documents open across requests.
+    """
+
+    def __init__(self, processes=None):
+        self.processes = processes or os.cpu_count() or 1
+        # Workers inherit the tracker, so the shared memory they attach to is tracked in one place
+        resource_tracker.ensure_running()
+        self.pool = multiprocessing.Pool(self.processes, initializer=_init_worker)
+        # The pool runs tasks first come, first served; background work submits nothing
+        # while renders the user is waiting for are in progress, see wait_for_foreground
+        self.foreground_renders = 0
+        self.foreground_done = threading.Condition()
+        print(f"Worker pool started with {self.processes} processes")
+
+    def wait_for_foreground(self, should_stop=None):
+        """Blocks until no foreground render is in progress, or should_stop() returns True."""
+        with self.foreground_done:
+            while self.foreground_renders and not (should_stop and should_stop()):
+                self.foreground_done.wait(TASK_POLL_INTERVAL)
+
+    def wait_for_result(self, task, page_num, should_stop=None):
+        """
+        Returns the task's result, or STOPPED once should_stop() returns True. Raises
+        TimeoutError if the task has not finished after TASK_TIMEOUT seconds.
+        """
+        deadline = time.monotonic() + TASK_TIMEOUT
+        while True:
+            try:
+                return task.get(timeout=TASK_POLL_INTERVAL)
+            except multiprocessing.TimeoutError:
+                if should_stop and should_stop(): return STOPPED
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Page {page_num} did not finish in the worker pool; its worker may have died")
+
+    def analyze_pages(self, pdf_path, pages, settings, dpi):
+        """Analyzes pages across all workers and merges their per-page results."""
+        return dict(self.iter_page_results(pdf_path, pages, settings, dpi))
+
+    def iter_page_results(self, pdf_path, pages, settings, dpi, should_stop=None, background=False):
+        """
+        Yields (page_num, page_result) in page order. Pages are submitted one task each,
+        and only a few per worker ahead of the consumer, so once should_stop() returns
+        True no new pages are started. Background analysis keeps at most one page per
+        worker in flight and submits none while foreground renders are in progress.
+        """
+        window = self.processes * (1 if background else TASKS_AHEAD_PER_WORKER)
+        pending = deque()
+        remaining = iter(pages)
+        while True:
+            while len(pending) < window and not (should_stop and should_stop()):
+                if background and self.foreground_renders:
+                    # Nothing is queued ahead of the foreground tasks; pages in flight are collected meanwhile
+                    if pending: break
+                    self.wait_for_foreground(should_stop)
+                    continue
+                page_num = next(remaining, None)
+                if page_num is None: break
+                pending.append((page_num, self.pool.apply_async(_analyze_pages_task, (pdf_path, [page_num], settings, dpi))))
+            if not pending: return
+            page_num, task = pending.popleft()
+            page_results = self.wait_for_result(task, page_num, should_stop)
+            if page_results is STOPPED: return
+            yield from page_results.items()
+
+    def iter_rendered_pages(self, pdf_path, pages, size, aa_level=None, should_stop=None, background=False):
+        """
+        Renders pages to fit `size` across all workers and yields RenderedPage in page
+        order. Workers write the samples into shared memory slots owned by this call, so
+        no pixels are pickled; each item's samples are only valid until the next one is
+        requested. Like iter_page_results, only a few pages per worker are in flight.
+        Background work waits while foreground renders are in progress; a background
+        render (a prefetch) is background work itself, with one page per worker in flight.
+        """
+        pages = list(pages)
+        window = min(self.processes * (1 if background else TASKS_AHEAD_PER_WORKER), len(pages))
+        if window == 0: return
+        slot_bytes = size[0] * size[1] * 3
+        slots = [shared_memory.SharedMemory(create=True, size=slot_bytes) for _ in range(window)]
+        free_slots = list(slots)
+        pending = deque()
+        remaining = iter(pages)
+        if not background:
+            with self.foreground_done: self.foreground_renders += 1
+        try:
+            while True:
+                while free_slots and not (should_stop and should_stop()):
+                    if background and self.foreground_renders:
+                        if pending: break
+                        self.wait_for_foreground(should_stop)
+                        continue
+                    page_num = next(remaining, None)
+                    if page_num is None: break
+                    slot = free_slots.pop()
+                    task = self.pool.apply_async(_render_page_task, (pdf_path, page_num, size, aa_level, slot.name))
+                    pending.append((page_num, slot, task))
+                if not pending: return
+                page_num, slot, task = pending.popleft()
+                try:
+                    rendered = self.wait_for_result(task, page_num, should_stop)
+                except TimeoutError as e:
+                    # The slot stays out of use in case the task still runs; a new one takes its place
+                    replacement = shared_memory.SharedMemory(create=True, size=slot_bytes)
+                    slots.append(replacement); free_slots.append(replacement)
+                    yield RenderedPage(page_num, None, 0, 0, 0, str(e))
+                    continue
+                except Exception as e:
+                    free_slots.append(slot)
+                    yield RenderedPage(page_num, None, 0, 0, 0, str(e))
+                    continue
+                if rendered is STOPPED:
+                    pending.appendleft((page_num, slot, task))
+                    return
+                width, height, stride = rendered
+                samples = slot.buf[:stride * height]
+                try:
+                    yield RenderedPage(page_num, samples, width, height, stride, None)
+                finally:
+                    samples.release()
+                    free_slots.append(slot)
+        finally:
+            deadline = time.monotonic() + CANCELLED_TASK_GRACE
+            for page_num, slot, task in pending:
+                # A worker may still be writing into the slot
+                task.wait(max(0, deadline - time.monotonic()))
+            for slot in slots:
+                slot.close()
+                slot.unlink()
+            if not background:
+                with self.foreground_done:
+                    self.foreground_renders -= 1
+                    self.foreground_done.notify_all()
+
+    def close(self):
+        """Stop all worker processes."""
+        self.pool.terminate()
+        self.pool.join()
+        print("Worker pool stopped.")
+
+# Global worker pool instance
+worker_pool = None
+
+def start_worker_pool(processes=None):
+    """
+    Start the global worker pool. Call this at startup, before the QApplication is
+    created, so workers are forked from a small process without GUI threads.
+    """
+    global worker_pool
+    if worker_pool is None and PYMUPDF_AVAILABLE:
+        try:
+            worker_pool = WorkerPool(processes)
+        except Exception as e:
+            print(f"Could not start worker pool, analysis will run in-process: {e}")
+            worker_pool = None
+    return worker_pool
+
+def get_worker_pool():
+    """Get the global worker pool, or None if it was not started."""
+    return worker_pool
+
+def cleanup_worker_pool():
+    """Clean up worker pool resources."""
+    global worker_pool
+    if worker_pool:
+        worker_pool.close()
+        worker_pool = None
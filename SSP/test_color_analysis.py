@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Test script for the color analysis
+Run this script to check that pages are priced as B&W or color the way they print.
+"""
+
+import os
+import sys
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import fitz
+import numpy as np
+from screens.Print_Options_Screen import PDFColorAnalyzer, ColorPixelKernel
+
+def make_analyzer(**settings):
+    return PDFColorAnalyzer(black_price=3.0, color_price=5.0, **settings)
+
+def test_colored_text_outline():
+    """Black text with a red outline is color; the text fill alone would say B&W."""
+    print("🔍 Testing text with a colored outline...")
+    doc = fitz.open()
+    page = doc.new_page()
+    # Render mode 2: fill and stroke
+    page.insert_text((50, 100), "Title", fontsize=60, render_mode=2, color=(1, 0, 0), fill=(0, 0, 0))
+    page_result = make_analyzer().analyze_page(page)
+    assert page_result['method'] != 'vector', "outlined text was proven gray without rendering"
+    assert not page_result['is_black_only'], "red-outlined text analyzed as B&W"
+    print("✅ Outlined text was analyzed as color")
+
+def test_gray_text_stays_vector():
+    """Plain black text is still proven gray without rendering."""
+    print("\n🔍 Testing plain black text...")
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((50, 100), "Title", fontsize=60)
+    page_result = make_analyzer().analyze_page(page)
+    assert page_result['method'] == 'vector', f"black text analyzed by {page_result['method']}"
+    assert page_result['is_black_only'], "black text analyzed as color"
+    print("✅ Black text was proven gray")
+
+def hairline_and_small_text_pages():
+    """Yields (name, page) for pages near the color threshold at low resolution."""
+    for width in (0.1, 0.2, 0.3):
+        for length in (50, 70, 90):
+            doc = fitz.open()
+            page = doc.new_page()
+            # Pixel-aligned at the first stage's resolution
+            page.draw_line((100, 100), (100 + length, 100), color=(1, 0, 0), width=width)
+            page.insert_text((50, 300), "Some black text", fontsize=12)
+            yield f"{width}pt x {length}pt red hairline", page
+    for fontsize in (3, 5, 8):
+        for lines in (1, 4):
+            doc = fitz.open()
+            page = doc.new_page()
+            for line in range(lines):
+                page.insert_text((50, 100 + 20 * line), "red", fontsize=fontsize, color=(1, 0, 0))
+            yield f"{lines} line(s) of {fontsize}pt red text", page
+
+def test_progressive_matches_full_render():
+    """On borderline pages the low-resolution stages reach the full render's verdict."""
+    print("\n🔍 Testing progressive against full-resolution verdicts...")
+    progressive, full = make_analyzer(), make_analyzer(progressive=False)
+    for name, page in hairline_and_small_text_pages():
+        expected = full.analyze_page(page)['is_black_only']
+        assert progressive.analyze_page(page)['is_black_only'] == expected, f"progressive verdict differs for {name}"
+    print("✅ Progressive verdicts match the full render")
+
+def test_coverage_from_full_resolution():
+    """Coverage is the full render's, or missing when a low-resolution stage decided the page."""
+    print("\n🔍 Testing ink and color coverage...")
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((50, 100), "Report", fontsize=14)
+    page.draw_rect(fitz.Rect(400, 40, 500, 120), color=(0, 0, 1), fill=(0.2, 0.4, 0.9))
+    full = make_analyzer(progressive=False).analyze_page(page)
+    progressive = make_analyzer().analyze_page(page)
+    assert progressive['ink_coverage'] in (None, full['ink_coverage']), "low-resolution ink coverage stored"
+    assert progressive['color_coverage'] in (None, full['color_coverage']), "low-resolution color coverage stored"
+    # Priced by coverage, so the color page must be measured at full resolution
+    tiered = make_analyzer(color_coverage_tiers=[(0.05, 8.0)]).analyze_page(page)
+    assert tiered['color_coverage'] == full['color_coverage'], "tiered color page not measured at full resolution"
+    print("✅ Coverage comes from the full-resolution render")
+
+def test_kernel_count_inked_first():
+    """count_inked() works on a fresh kernel and after its buffers grow."""
+    print("\n🔍 Testing the pixel kernel's ink count...")
+    kernel = ColorPixelKernel()
+    assert kernel.count_inked(245) == 0, "fresh kernel counted ink"
+    small = np.full((2, 2, 3), 255, dtype=np.uint8)
+    small[0, 0] = (0, 0, 0)
+    kernel.channel_spread(small)
+    assert kernel.count_inked(245) == 1, "ink miscounted"
+    # Growing the buffers must not leave count_inked() reading the old image
+    kernel._ensure_capacity(100)
+    assert kernel.count_inked(245) == 0, "ink counted from replaced buffers"
+    large = np.zeros((10, 10, 3), dtype=np.uint8)
+    kernel.channel_spread(large)
+    assert kernel.count_inked(245) == 100, "ink miscounted after the buffers grew"
+    print("✅ The kernel's ink count is safe to call first")
+
+def main():
+    """Run all tests."""
+    print("🎨 SSP Color Analysis Test")
+    print("=" * 40)
+
+    tests = [
+        test_colored_text_outline,
+        test_gray_text_stays_vector,
+        test_progressive_matches_full_render,
+        test_coverage_from_full_resolution,
+        test_kernel_count_inked_first
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            test()
+            results.append(True)
+        except AssertionError as e:
+            print(f"❌ {e}")
+            results.append(False)
+
+    print("\n" + "=" * 40)
+    if all(results):
+        print("✅ All color analysis tests passed!")
+    else:
+        print("❌ Some color analysis tests failed.")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Test script for the worker pool
+Run this script to check that workers render and analyze the file currently at a path,
+also after the next customer's file of the same name was copied over it.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import fitz
+from screens import worker_pool
+from screens.worker_pool import WorkerPool
+
+def write_filled_page(path, color):
+    """Writes a one-page PDF filled with color (an RGB tuple of 0-1 floats)."""
+    doc = fitz.open()
+    page = doc.new_page()
+    page.draw_rect(page.rect, color=color, fill=color)
+    doc.save(path)
+    doc.close()
+
+def overwrite_with_filled_page(path, color):
+    """Replaces the file like the USB manager's copy does, with a different mtime."""
+    previous_mtime_ns = os.stat(path).st_mtime_ns
+    write_filled_page(path, color)
+    os.utime(path, ns=(previous_mtime_ns + 10**9, previous_mtime_ns + 10**9))
+
+def center_pixel(pool, path):
+    for rendered in pool.iter_rendered_pages(path, [1], (60, 80)):
+        assert rendered.error is None, rendered.error
+        x, y = rendered.width // 2, rendered.height // 2
+        offset = y * rendered.stride + x * 3
+        return tuple(rendered.samples[offset:offset + 3])
+
+def test_render_after_overwrite():
+    """A page rendered after the file was overwritten shows the new file."""
+    print("🔍 Testing rendering of an overwritten file...")
+    pool = WorkerPool(1)
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "report.pdf")
+            write_filled_page(path, (1, 0, 0))
+            assert center_pixel(pool, path) == (255, 0, 0), "first file not rendered red"
+            overwrite_with_filled_page(path, (0, 0, 1))
+            pixel = center_pixel(pool, path)
+            assert pixel == (0, 0, 255), f"overwritten file rendered as {pixel}, expected blue"
+    finally:
+        pool.close()
+    print("✅ The overwritten file was rendered")
+
+def test_analysis_after_overwrite():
+    """A page analyzed after the file was overwritten is analyzed from the new file."""
+    print("\n🔍 Testing analysis of an overwritten file...")
+    settings = {'black_price': 3.0, 'color_price': 5.0}
+    pool = WorkerPool(1)
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "report.pdf")
+            write_filled_page(path, (0.5, 0.5, 0.5))
+            assert pool.analyze_pages(path, [1], settings, 50)[1]['is_black_only'], "gray page not black-only"
+            overwrite_with_filled_page(path, (1, 0, 0))
+            assert not pool.analyze_pages(path, [1], settings, 50)[1]['is_black_only'], "red page analyzed as black-only"
+    finally:
+        pool.close()
+    print("✅ The overwritten file was analyzed")
+
+def test_background_analysis_waits_for_renders():
+    """Background analysis starts no pages while a foreground render is in progress."""
+    print("\n🔍 Testing background analysis during a render...")
+    pool = WorkerPool(1)
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "report.pdf")
+            write_filled_page(path, (1, 0, 0))
+            results = {}
+            def analyze():
+                results.update(pool.iter_page_results(path, [1], {'black_price': 3.0, 'color_price': 5.0}, 50, background=True))
+            render = pool.iter_rendered_pages(path, [1, 1], (60, 80))
+            next(render)
+            analysis = threading.Thread(target=analyze)
+            analysis.start()
+            analysis.join(1)
+            assert analysis.is_alive() and not results, "background analysis ran during the render"
+            render.close()
+            analysis.join(10)
+            assert 1 in results, "background analysis did not resume after the render"
+    finally:
+        pool.close()
+    print("✅ Background analysis waited for the render")
+
+def test_background_render_waits_for_renders():
+    """A prefetch starts no pages while a foreground render is in progress."""
+    print("\n🔍 Testing a background render during a render...")
+    pool = WorkerPool(1)
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "report.pdf")
+            write_filled_page(path, (1, 0, 0))
+            rendered_pages = []
+            def prefetch():
+                rendered_pages.extend(rendered.page_num for rendered in pool.iter_rendered_pages(path, [1], (60, 80), background=True))
+            render = pool.iter_rendered_pages(path, [1, 1], (60, 80))
+            next(render)
+            background = threading.Thread(target=prefetch)
+            background.start()
+            background.join(1)
+            assert background.is_alive() and not rendered_pages, "background render ran during the render"
+            render.close()
+            background.join(10)
+            assert rendered_pages == [1], "background render did not resume after the render"
+    finally:
+        pool.close()
+    print("✅ The background render waited for the render")
+
+def _die_in_worker(*args):
+    """Stands in for a task whose worker crashes, e.g. MuPDF segfaulting on a malformed PDF."""
+    os._exit(1)
+
+def test_dead_worker_times_out():
+    """A page whose worker died is reported instead of blocking its consumer forever."""
+    print("\n🔍 Testing a worker that dies during a task...")
+    original_task, original_timeout = worker_pool._analyze_pages_task, worker_pool.TASK_TIMEOUT
+    # Patched before the pool forks, so the workers run the crashing task too
+    worker_pool._analyze_pages_task, worker_pool.TASK_TIMEOUT = _die_in_worker, 1
+    pool = WorkerPool(1)
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "report.pdf")
+            write_filled_page(path, (1, 0, 0))
+            try:
+                pool.analyze_pages(path, [1], {'black_price': 3.0, 'color_price': 5.0}, 50)
+                assert False, "the dead worker's page returned a result"
+            except TimeoutError:
+                pass
+            # Cancelling while the task hangs returns without waiting for the deadline
+            assert list(pool.iter_page_results(path, [1], {}, 50, should_stop=lambda: True)) == [], "stopped iteration yielded pages"
+    finally:
+        worker_pool._analyze_pages_task, worker_pool.TASK_TIMEOUT = original_task, original_timeout
+        pool.close()
+    print("✅ The dead worker's page was reported")
+
+def main():
+    """Run all tests."""
+    print("⚙️  SSP Worker Pool Test")
+    print("=" * 40)
+
+    tests = [
+        test_render_after_overwrite,
+        test_analysis_after_overwrite,
+        test_background_analysis_waits_for_renders,
+        test_background_render_waits_for_renders,
+        test_dead_worker_times_out
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            test()
+            results.append(True)
+        except AssertionError as e:
+            print(f"❌ {e}")
+            results.append(False)
+
+    print("\n" + "=" * 40)
+    if all(results):
+        print("✅ All worker pool tests passed!")
+    else:
+        print("❌ Some worker pool tests failed.")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()